@@ -1,18 +1,58 @@
+import functools
+import logging
+import math
+import time
+
+import pandas as pd
 import streamlit as st
 from utils import (
     initialize_apis,
-    initialize_session_state,
-    scrape_website_content,
+    crawl_website,
+    merge_page_texts,
     extract_business_info_from_website,
-    generate_recommendations,
-    apply_recommendation,
+    stream_recommendations,
+    generate_recommendations_parallel,
+    RECOMMENDATION_CATEGORIES,
     generate_logo_with_dalle,
     search_competitors,
+    enrich_competitors,
+    validate_url
+)
+from cache import make_key
+from deadline import deadline_scope, stage
+from jobs import job_manager
+from profiling import profile_rerun, profiling_requested, record_handler, rerun_profiled
+from rate_limit import current_session
+from telemetry import span
+from ui import (
+    initialize_session_state,
+    apply_recommendation,
     display_business_summary,
     display_applied_recommendations,
-    validate_url
+    display_performance_panel,
+    display_project_browser,
+    autosave_project,
+    load_pending_artifact
 )
 
+logger = logging.getLogger(__name__)
+
+# Competitor search size and how many rows the results table shows at a time
+COMPETITOR_LIMIT = 100
+COMPETITOR_RESULTS_PER_QUERY = 10
+COMPETITORS_PAGE_SIZE = 25
+
+# Competitors whose own websites are scraped and profiled, best-ranked first
+COMPETITORS_ENRICHED = 25
+
+# Seconds between reruns of a tab showing a running job's progress
+POLL_SECONDS = 1
+
+# End-to-end deadlines, in seconds, for each background job; every stage gets what is left
+EXTRACT_DEADLINE = 60
+RECOMMENDATIONS_DEADLINE = 60
+COMPETITORS_DEADLINE = 90
+
 # =============================================================================
 # PAGE CONFIGURATION
 # =============================================================================
@@ -29,58 +69,145 @@ st.set_page_config(
 # =============================================================================
 
 # Initialize APIs and session state
-llm, tavily_client = initialize_apis()
+llm, tavily_client = initialize_apis(
+    st.secrets["OPENAI_API_KEY"],
+    st.secrets.get("TAVILY_API_KEY", "")
+)
 initialize_session_state()
 
+# Lets the shared API rate limiters queue this session's calls fairly
+current_session.set(st.session_state.session_id)
+
 # =============================================================================
 # MAIN APPLICATION
 # =============================================================================
 
 def main():
+    start = time.thread_time()
     st.title("🚀 Business AI Assistant - Claude Uplift")
     st.markdown("*Comprehensive business analysis and strategic insights powered by Claude*")
     st.divider()
     
-    # Create 4 tabs as specified
-    tab1, tab2, tab3, tab4 = st.tabs([
-        "📊 Business Information", 
-        "💡 Recommendations", 
-        "🎨 Logo Generation", 
-        "🔍 Competitor Analysis"
-    ])
-    
-    # =============================================================================
-    # TAB 1: BUSINESS INFORMATION
-    # =============================================================================
-    
-    with tab1:
-        handle_business_information()
-    
-    # =============================================================================
-    # TAB 2: RECOMMENDATIONS
-    # =============================================================================
-    
-    with tab2:
-        handle_recommendations()
-    
-    # =============================================================================
-    # TAB 3: LOGO GENERATION
-    # =============================================================================
-    
-    with tab3:
-        handle_logo_generation()
+    # Only the selected tab is executed: unlike st.tabs, which runs all four
+    # handlers on every rerun, hidden tabs cost nothing
+    tabs = {
+        "📊 Business Information": handle_business_information,
+        "💡 Recommendations": handle_recommendations,
+        "🎨 Logo Generation": handle_logo_generation,
+        "🔍 Competitor Analysis": handle_competitor_analysis
+    }
+    active_tab = st.radio(
+        "Section",
+        list(tabs),
+        horizontal=True,
+        key="active_tab",
+        label_visibility="collapsed"
+    )
     
-    # =============================================================================
-    # TAB 4: COMPETITOR ANALYSIS
-    # =============================================================================
+    tabs[active_tab]()
     
-    with tab4:
-        handle_competitor_analysis()
+    with st.sidebar:
+        display_project_browser()
+        st.divider()
+        if st.checkbox("⏱️ Show performance panel", key="show_performance"):
+            display_performance_panel()
+    record_render_cpu('main', time.thread_time() - start)
+
+# =============================================================================
+# PARTIAL RERUNS
+# =============================================================================
+
+def tab_fragment(*job_keys):
+    """Run a tab handler as a fragment, recording its CPU and wall time per run
+
+    Widgets inside a fragment rerun only that fragment, so an Apply click
+    re-executes the Recommendations tab and nothing else. When profiling is
+    on, such a fragment-only rerun is profiled on its own. Each run ends by
+    saving the project, so changes made in fragment-only reruns are kept,
+    and runs with the session set, so their spans and the jobs they start
+    count towards this session.
+
+    While one of the background jobs stored under `job_keys` is running,
+    the tab is declared with run_every instead, so it reruns itself every
+    POLL_SECONDS to show the job's progress; fragments can't be nested, so
+    the handlers don't poll on their own. A full rerun switches between the
+    two: after the run that started a job, and once it has finished.
+    """
+    def decorate(func):
+        def timed(*args, **kwargs):
+            start = time.thread_time()
+            started = time.perf_counter()
+            try:
+                with span(f'render.{func.__name__}'):
+                    return func(*args, **kwargs)
+            finally:
+                record_render_cpu(func.__name__, time.thread_time() - start)
+                record_handler(func.__name__, time.perf_counter() - started)
+        
+        def saved(*args, **kwargs):
+            result = timed(*args, **kwargs)
+            autosave_project()
+            return result
+        
+        def profiled(*args, **kwargs):
+            # A fragment-only rerun runs on a new thread and skips the module
+            # code that sets the session, so set it here for the handler's
+            # spans and the jobs and limiter tickets it submits
+            token = current_session.set(st.session_state.session_id)
+            try:
+                if st.session_state.get('profiling') and not rerun_profiled():
+                    with profile_rerun(func.__name__, st.session_state.session_id):
+                        return saved(*args, **kwargs)
+                return saved(*args, **kwargs)
+            finally:
+                current_session.reset(token)
+        
+        # Both keep func's name, so they are the same fragment to Streamlit
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            result = profiled(*args, **kwargs)
+            if jobs_active(job_keys):
+                # Started in this run: rerun the script to declare the polling fragment
+                st.rerun()
+            return result
+        
+        @functools.wraps(func)
+        def poll(*args, **kwargs):
+            if not jobs_active(job_keys):
+                # Finished: a full rerun shows the result and stops the timer
+                st.rerun()
+            return profiled(*args, **kwargs)
+        
+        fragment = st.experimental_fragment(run)
+        polling_fragment = st.experimental_fragment(run_every=POLL_SECONDS)(poll)
+        
+        @functools.wraps(func)
+        def dispatch(*args, **kwargs):
+            if jobs_active(job_keys):
+                return polling_fragment(*args, **kwargs)
+            return fragment(*args, **kwargs)
+        return dispatch
+    return decorate
+
+def jobs_active(job_keys):
+    """True if a job stored under one of `job_keys` is still running"""
+    for state_key in job_keys:
+        job_id = st.session_state.get(state_key)
+        job = job_manager.get(job_id) if job_id else None
+        if job is not None and job.active:
+            return True
+    return False
+
+def record_render_cpu(name, seconds):
+    """Store the script thread's CPU seconds for the latest run of `name`"""
+    st.session_state.render_cpu[name] = seconds
+    logger.debug("%s: %.1f ms CPU", name, seconds * 1000)
 
 # =============================================================================
 # TAB HANDLERS
 # =============================================================================
 
+@tab_fragment('extraction_job')
 def handle_business_information():
     """Handle business information tab"""
     st.header("📊 Business Information")
@@ -121,30 +248,42 @@ def handle_website_import():
         help="Enter the full URL including https://"
     )
     
-    if website_url and st.button("🔍 Extract Business Information", type="primary"):
+    if not website_url:
+        return
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        extract_clicked = st.button("🔍 Extract Business Information", type="primary", use_container_width=True)
+    
+    with col2:
+        # Skips the response cache and asks the model again
+        reextract_clicked = st.button("🔄 Re-extract", type="secondary", use_container_width=True)
+    
+    if extract_clicked or reextract_clicked:
         if not validate_url(website_url):
             st.error("Please enter a valid URL (including https://)")
             return
         
-        with st.spinner("Scraping website and extracting business information..."):
-            # Scrape website content
-            content = scrape_website_content(website_url)
-            
-            if content:
-                # Extract business info using LangChain
-                extracted_info = extract_business_info_from_website(content, website_url, llm)
-                
-                if extracted_info:
-                    st.session_state.business_data = extracted_info
-                    st.success("✅ Business information extracted successfully!")
-                    
-                    # Display extracted information
-                    st.subheader("📋 Extracted Information")
-                    display_business_summary()
-                else:
-                    st.error("Failed to extract business information from the website.")
-            else:
-                st.error("Failed to scrape website content. Please check the URL and try again.")
+        use_cache = not reextract_clicked
+        job = job_manager.submit(('extract', website_url, use_cache), extract_business_job, website_url, llm, use_cache)
+        st.session_state.extraction_job = job.id
+    
+    job = tracked_job('extraction_job')
+    if job is None:
+        return
+    
+    if job.active:
+        display_job_message(job)
+    elif job.status == 'done':
+        st.session_state.business_data = job.result['business_data']
+        st.success(f"✅ Business information extracted successfully from {job.result['pages']} page(s)!")
+        
+        # Display extracted information
+        st.subheader("📋 Extracted Information")
+        display_business_summary()
+    else:
+        st.error(str(job.error))
 
 def handle_manual_import():
     """Handle manual business information entry"""
@@ -187,6 +326,7 @@ def handle_manual_import():
             else:
                 st.error("Please fill in all required fields (marked with *).")
 
+@tab_fragment('recommendations_job', 'regenerate_job')
 def handle_recommendations():
     """Handle recommendations tab"""
     st.header("💡 Recommendations")
@@ -207,35 +347,128 @@ def handle_recommendations():
     
     st.divider()
     
-    # Generate recommendations button
-    if st.button("🎯 Generate Recommendations", type="primary", use_container_width=True):
-        with st.spinner("Generating personalized recommendations..."):
-            recommendations = generate_recommendations(st.session_state.business_data, llm)
-            st.session_state.recommendations = recommendations
+    # Recommendations of a reopened project are read from the store only now
+    load_pending_artifact('recommendations')
+    
+    # Generate recommendations buttons
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        generate_clicked = st.button("🎯 Generate Recommendations", type="primary", use_container_width=True)
+    
+    with col2:
+        # Skips the response cache and asks the model again
+        regenerate_clicked = st.button("🔄 Regenerate", type="secondary", use_container_width=True)
+    
+    if generate_clicked or regenerate_clicked:
+        business_data = st.session_state.business_data
+        use_cache = not regenerate_clicked
+        job = job_manager.submit(
+            ('recommendations', make_key(business_data), use_cache),
+            recommendations_job, dict(business_data), llm, use_cache
+        )
+        st.session_state.recommendations_job = job.id
+    
+    job = tracked_job('recommendations_job')
+    if job is not None and job.active:
+        display_recommendations_progress(job)
+        return
+    
+    if job is not None:
+        if job.status == 'done' and job.result:
+            st.session_state.recommendations = job.result
+            st.session_state.recommendation_timing = (
+                f"⏱️ First recommendation after {job.first_partial - job.started:.1f}s, "
+                f"all {len(job.result)} after {job.elapsed():.1f}s"
+            )
+        else:
+            st.error("Failed to generate recommendations. Please try again.")
+    
+    # A single category being regenerated, while the others stay usable
+    regenerating = tracked_job('regenerate_job')
+    if regenerating is not None:
+        i, rec_type = st.session_state.regenerate_target
+        if regenerating.active:
+            display_job_message(regenerating)
+        elif regenerating.status == 'done' and regenerating.result:
+            recommendations = st.session_state.recommendations
+            if i < len(recommendations) and recommendations[i]['type'] == rec_type:
+                recommendations[i] = regenerating.result[0]
+        else:
+            st.error(f"Failed to regenerate {rec_type}. Please try again.")
     
     # Display recommendations with action buttons
     if st.session_state.recommendations:
         st.subheader("📝 Generated Recommendations")
+        if st.session_state.get('recommendation_timing'):
+            st.caption(st.session_state.recommendation_timing)
         
         # Create table-like display
         for i, rec in enumerate(st.session_state.recommendations):
-            with st.container():
-                col1, col2, col3 = st.columns([2, 3, 1])
-                
-                with col1:
-                    st.write(f"**{rec['type']}**")
-                    st.write(rec['recommendation'])
-                
-                with col2:
-                    st.write(rec['description'])
-                
-                with col3:
-                    if st.button(f"Apply", key=f"apply_{i}", type="secondary"):
-                        apply_recommendation(rec['type'], rec['recommendation'])
-                        st.rerun()
-                
-                st.divider()
+            display_recommendation(i, rec)
+
+def display_recommendations_progress(job):
+    """Display the recommendations received so far by a running job"""
+    st.subheader("📝 Generated Recommendations")
+    partial = job.snapshot()
+    if partial:
+        st.caption(f"⏱️ First recommendation after {job.first_partial - job.started:.1f}s")
+    display_job_message(job)
+    
+    for i, rec in enumerate(partial):
+        display_recommendation(i, rec, actions=False)
+
+def display_recommendation(i, rec, actions=True):
+    """Display one recommendation row, with its Apply button unless actions=False"""
+    with st.container():
+        col1, col2, col3 = st.columns([2, 3, 1])
+        
+        with col1:
+            st.write(f"**{rec['type']}**")
+            st.write(rec['recommendation'])
+        
+        with col2:
+            st.write(rec['description'])
+        
+        if actions:
+            with col3:
+                display_recommendation_actions(i, rec)
+        
+        st.divider()
 
+def display_recommendation_actions(i, rec):
+    """Display the Apply and regenerate buttons of one recommendation"""
+    # Callbacks run before the fragment rerenders, so the change shows without st.rerun()
+    st.button(
+        "Apply",
+        key=f"apply_{i}",
+        type="secondary",
+        on_click=apply_recommendation,
+        args=(rec['type'], rec['recommendation'])
+    )
+    
+    # Regenerate just this category, leaving the others as they are
+    if rec['type'] in RECOMMENDATION_CATEGORIES:
+        st.button(
+            "🔄",
+            key=f"regenerate_{i}",
+            help=f"Regenerate {rec['type']}",
+            on_click=regenerate_recommendation,
+            args=(i, rec['type']),
+            disabled=jobs_active(('regenerate_job',))
+        )
+
+def regenerate_recommendation(i, rec_type):
+    """Start replacing recommendation `i` with a freshly generated one of the same category"""
+    business_data = st.session_state.business_data
+    job = job_manager.submit(
+        ('regenerate', make_key(business_data), rec_type),
+        regenerate_job, dict(business_data), llm, rec_type
+    )
+    st.session_state.regenerate_job = job.id
+    st.session_state.regenerate_target = (i, rec_type)
+
+@tab_fragment()
 def handle_logo_generation():
     """Handle logo generation tab"""
     st.header("🎨 Logo Generation")
@@ -298,6 +531,7 @@ def handle_logo_generation():
     if st.session_state.logo_url:
         st.divider()
         st.subheader("🖼️ Your Generated Logo")
+        st.info("Logo generation would use DALL-E API here")
         
         business_name = st.session_state.business_data.get('business_name', 'Your Business')
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -306,6 +540,7 @@ def handle_logo_generation():
         
         st.markdown("💡 **Tip:** Right-click on the logo image and select 'Save image as...' to download it.")
 
+@tab_fragment('competitors_job')
 def handle_competitor_analysis():
     """Handle competitor analysis tab"""
     st.header("🔍 Competitor Analysis")
@@ -321,57 +556,237 @@ def handle_competitor_analysis():
     
     st.divider()
     
+    load_pending_artifact('competitors')
+    
     # Search for competitors
-    if st.button("🔍 Search for Competitors", type="primary", use_container_width=True):
-        with st.spinner("Searching for competitors..."):
-            competitors = search_competitors(st.session_state.business_data, tavily_client)
-            st.session_state.competitors = competitors
-            
-            if competitors:
-                st.success(f"✅ Found {len(competitors)} potential competitors!")
-            else:
-                st.warning("No competitors found. Try adjusting your business information.")
+    enrich = st.checkbox(
+        "🔬 Profile competitor websites",
+        value=True,
+        help=f"Visit the top {COMPETITORS_ENRICHED} competitors' own websites for their description and industry"
+    )
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        search_clicked = st.button("🔍 Search for Competitors", type="primary", use_container_width=True)
+    
+    with col2:
+        # Skips the competitor index and the search cache and searches again
+        refresh_clicked = st.button("🔄 Search Again", type="secondary", use_container_width=True)
+    
+    if search_clicked or refresh_clicked:
+        business_data = st.session_state.business_data
+        use_cache = not refresh_clicked
+        job = job_manager.submit(
+            ('competitors', make_key(business_data), enrich, use_cache),
+            competitors_job, dict(business_data), tavily_client, llm, enrich, use_cache
+        )
+        st.session_state.competitors_job = job.id
+    
+    job = tracked_job('competitors_job')
+    if job is not None and job.active:
+        display_competitors_progress(job)
+        return
+    
+    if job is not None:
+        competitors = job.result or []
+        st.session_state.competitors = competitors
+        # New results start on their first page
+        st.session_state.pop('competitors_page', None)
+        
+        if competitors:
+            st.success(f"✅ Found {len(competitors)} potential competitors! ({job.elapsed():.1f}s)")
+        else:
+            st.warning("No competitors found. Try adjusting your business information.")
     
     # Display competitor results
     if st.session_state.competitors:
         st.subheader("📊 Competitor Analysis Results")
+        display_competitors_table(st.session_state.competitors)
+
+def display_competitors_progress(job):
+    """Display the competitors found so far, updated as their websites are profiled"""
+    display_job_message(job)
+    
+    rows = {}
+    for index, competitor in job.snapshot():
+        rows[index] = competitor
+    if rows:
+        display_competitors_table([rows[index] for index in sorted(rows)])
+
+def display_competitors_table(competitors):
+    """Display competitors as one sortable, paginated table
+
+    Only the current page is sent to the browser, so the payload stays the
+    same size however many competitors were found. The default order is the
+    search's own ranking, best match first. Selecting a row shows its
+    description below the table.
+    """
+    table = pd.DataFrame.from_records(competitors, columns=['name', 'website', 'industry', 'description', 'enriched'])
+    table['enriched'] = table['enriched'].fillna(False).astype(bool)
+    pages = max(math.ceil(len(table) / COMPETITORS_PAGE_SIZE), 1)
+    
+    col1, col2 = st.columns([3, 1])
+    
+    with col1:
+        sort_by = st.selectbox("Sort by", ["Relevance", "Name", "Website", "Industry"], key="competitors_sort")
+    
+    with col2:
+        # A page kept from a longer list (e.g. an opened project's) may no longer exist
+        if st.session_state.get('competitors_page', 1) > pages:
+            st.session_state.competitors_page = pages
+        page = st.number_input("Page", min_value=1, max_value=pages, key="competitors_page")
+    
+    if sort_by != "Relevance":
+        table = table.sort_values(sort_by.lower(), key=lambda column: column.fillna('').str.lower(), kind='stable')
+    start = (page - 1) * COMPETITORS_PAGE_SIZE
+    page_rows = table.iloc[start:start + COMPETITORS_PAGE_SIZE]
+    
+    event = st.dataframe(
+        page_rows,
+        column_order=('name', 'website', 'industry', 'enriched'),
+        column_config={
+            'name': st.column_config.TextColumn("Competitor Name"),
+            'website': st.column_config.LinkColumn("Competitor Website", display_text=r"https?://(?:www\.)?([^/]+)"),
+            'industry': st.column_config.TextColumn("Competitor Industry"),
+            'enriched': st.column_config.CheckboxColumn("Profiled", help="Details taken from the competitor's own website")
+        },
+        hide_index=True,
+        use_container_width=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        # A new key per page and order, so a selection doesn't carry over to another row
+        key=f"competitors_table_{sort_by}_{page}"
+    )
+    st.caption(f"Showing {start + 1}-{start + len(page_rows)} of {len(table)} competitors · page {page} of {pages}")
+    
+    if event.selection.rows:
+        competitor = page_rows.iloc[event.selection.rows[0]]
+        with st.expander(f"ℹ️ {competitor['name']}", expanded=True):
+            st.write(competitor['description'] or "No description available")
+            if competitor['website']:
+                st.write(f"[Visit Website]({competitor['website']})")
+    else:
+        st.caption("Select a row to see its description.")
+
+# =============================================================================
+# BACKGROUND JOBS
+# =============================================================================
+
+# These run on the job pool, outside the script thread, so they must not call st.*.
+# Each runs under a deadline_scope; the stages inside it share what is left of
+# the deadline and return what they have when it passes.
+
+def extract_business_job(job, url, llm, use_cache):
+    """Crawl a website and extract its business information"""
+    with deadline_scope(EXTRACT_DEADLINE) as deadline:
+        job.report("Scraping website...")
+        # Scrape the homepage plus the about/services/pricing pages it links to
+        with stage('scrape'):
+            pages = crawl_website(url)
+        content = merge_page_texts(pages)
+        if not content:
+            raise RuntimeError("Failed to scrape website content. Please check the URL and try again.")
         
-        # Create table header
-        col1, col2, col3 = st.columns([2, 2, 2])
-        with col1:
-            st.write("**Competitor Name**")
-        with col2:
-            st.write("**Competitor Website**")
-        with col3:
-            st.write("**Competitor Industry**")
+        job.report(f"Extracting business information from {len(pages)} page(s)...")
+        with stage('extract'):
+            extracted_info = extract_business_info_from_website(content, url, llm, use_cache=use_cache)
+        if not extracted_info:
+            if deadline.expired:
+                raise RuntimeError("Timed out extracting business information. Please try again.")
+            raise RuntimeError("Failed to extract business information from the website.")
+    return {'business_data': extracted_info, 'pages': len(pages)}
+
+def recommendations_job(job, business_data, llm, use_cache):
+    """Generate recommendations, publishing each one as it arrives"""
+    with deadline_scope(RECOMMENDATIONS_DEADLINE) as deadline:
+        job.report("Generating personalized recommendations...")
+        recommendations = []
+        with stage('recommend'):
+            for rec in stream_recommendations(business_data, llm, use_cache=use_cache):
+                recommendations.append(rec)
+                job.report(partial=rec)
         
-        st.divider()
+        # Ask again, one request per category, for any category the model skipped or garbled
+        received = {rec['type'] for rec in recommendations}
+        missing = [category for category in RECOMMENDATION_CATEGORIES if category not in received]
+        if missing and not deadline.expired:
+            job.report(f"Filling in {', '.join(missing)}...")
+            with stage('recommend_fill'):
+                for rec in generate_recommendations_parallel(business_data, llm, categories=missing):
+                    recommendations.append(rec)
+                    job.report(partial=rec)
+    
+    # Filled-in categories arrive last; store them in the usual category order
+    order = {category: index for index, category in enumerate(RECOMMENDATION_CATEGORIES)}
+    return sorted(recommendations, key=lambda rec: order.get(rec['type'], len(order)))
+
+def regenerate_job(job, business_data, llm, rec_type):
+    """Generate one new recommendation of category `rec_type`, bypassing the cache"""
+    with deadline_scope(RECOMMENDATIONS_DEADLINE):
+        job.report(f"Regenerating {rec_type}...")
+        with stage('regenerate'):
+            return generate_recommendations_parallel(business_data, llm, categories=[rec_type], use_cache=False)
+
+def competitors_job(job, business_data, tavily_client, llm, enrich, use_cache=True):
+    """Search for competitors, then profile the top ones from their own websites
+
+    Partial results are (index, competitor) pairs: first every search
+    result, then each profiled row replacing the one at its index.
+    """
+    with deadline_scope(COMPETITORS_DEADLINE) as deadline:
+        job.report("Searching for competitors...")
+        with stage('competitors'):
+            competitors = search_competitors(
+                business_data,
+                tavily_client,
+                limit=COMPETITOR_LIMIT,
+                results_per_query=COMPETITOR_RESULTS_PER_QUERY,
+                use_cache=use_cache
+            )
+        for index, competitor in enumerate(competitors):
+            job.report(partial=(index, competitor))
         
-        # Display competitors in table format
-        for competitor in st.session_state.competitors:
-            col1, col2, col3 = st.columns([2, 2, 2])
-            
-            with col1:
-                st.write(competitor['name'])
-            
-            with col2:
-                if competitor['website']:
-                    st.write(f"[Visit Website]({competitor['website']})")
-                else:
-                    st.write("Not available")
-            
-            with col3:
-                st.write(competitor['industry'])
-            
-            # Show description if available
-            if competitor.get('description'):
-                st.caption(competitor['description'])
-            
-            st.divider()
+        if enrich and competitors and not deadline.expired:
+            top = competitors[:COMPETITORS_ENRICHED]
+            job.report(f"Profiling {len(top)} competitor websites...")
+            with stage('enrich'):
+                rows = enrich_competitors(
+                    top, llm, tavily_client, industry=business_data.get('business_industry')
+                )
+                for index, competitor in rows:
+                    competitors[index] = competitor
+                    job.report(partial=(index, competitor))
+    return competitors
+
+def tracked_job(state_key):
+    """Return the job whose id is stored under `state_key`
+
+    The id is dropped from session state once the job has finished (or
+    expired), so its result is handled on exactly one rerun.
+    """
+    job_id = st.session_state.get(state_key)
+    job = job_manager.get(job_id) if job_id else None
+    if job is None or not job.active:
+        st.session_state.pop(state_key, None)
+    return job
+
+def display_job_message(job):
+    """Display a running job's latest progress message"""
+    st.info(f"⏳ {job.message or 'Working...'} ({job.elapsed():.0f}s)")
 
 # =============================================================================
 # RUN APPLICATION
 # =============================================================================
 
+def run_app():
+    """Run main(), under the profiler if APP_PROFILE is set or the URL has ?profile=1"""
+    st.session_state.profiling = profiling_requested(st.query_params)
+    if st.session_state.profiling:
+        with profile_rerun('main', st.session_state.session_id):
+            main()
+    else:
+        main()
+
 if __name__ == "__main__":
-    main()
+    run_app()
@@ -0,0 +1,301 @@
+"""Headless batch analysis of many businesses
+
+Reads a CSV or JSONL file of records and runs each one through the same
+stages as the app: scrape -> extract -> recommend -> competitors. A record
+either has a `url` (or `business_website`) to scrape, or the manual fields
+`business_name`, `business_description` and `business_industry`, in which
+case scraping and extraction are skipped.
+
+Results are appended to the output JSONL as each record finishes. The output
+doubles as the checkpoint: rerunning with the same output file skips the
+records already in it, so an interrupted run resumes where it stopped.
+With --retry-failed, records whose row lists errors are run again and a new
+row is appended; the last row for an id is the current one.
+
+    python batch.py businesses.csv results.jsonl --recommend-concurrency 8
+
+With --deadline, each record must finish within that many seconds: every
+stage gets the time the earlier ones left, stages that run out return what
+they have, and the run summary counts deadline misses per stage.
+
+The summary also totals time, bytes, tokens and estimated cost per step,
+and gives the API limiters' queue depth and wait times, the cache hit
+ratios and the coalesced calls; --metrics writes the same in Prometheus
+text format, and setting TELEMETRY_JSONL logs every step to that file.
+
+API keys are read from OPENAI_API_KEY and TAVILY_API_KEY.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from cache import make_key
+from deadline import deadline_scope, deadline_stats, stage as deadline_stage
+from telemetry import telemetry
+from utils import (
+    initialize_apis,
+    scrape_website_content,
+    crawl_website,
+    merge_page_texts,
+    extract_business_info_from_website,
+    generate_recommendations,
+    search_competitors
+)
+
+logger = logging.getLogger("batch")
+
+STAGES = ("scrape", "extract", "recommend", "competitors")
+
+# =============================================================================
+# INPUT / OUTPUT
+# =============================================================================
+
+def read_records(path):
+    """Yield input records from a CSV or JSONL file"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.endswith(('.jsonl', '.ndjson')):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from csv.DictReader(f)
+
+def record_id(record):
+    """Stable id for a record: its `id` field, else a hash of its contents"""
+    if record.get('id'):
+        return str(record['id'])
+    return make_key(record)[:16]
+
+def completed_ids(path, retry_failed=False):
+    """Ids of the records already written to the output file
+
+    With `retry_failed`, only ids whose last row has no errors count as
+    done, so failed records are run again.
+    """
+    failed = {}
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+                failed[row['id']] = bool(row.get('errors'))
+            except (ValueError, KeyError):
+                # A line cut short by an interrupted run
+                continue
+    return {id_ for id_, errors in failed.items() if not (retry_failed and errors)}
+
+# =============================================================================
+# STAGE STATISTICS
+# =============================================================================
+
+class StageStats:
+    """Per-stage call, error and timing counters, safe to update from threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {stage: {'calls': 0, 'errors': 0, 'seconds': 0.0} for stage in STAGES}
+
+    def record(self, stage, seconds, ok):
+        with self._lock:
+            counts = self.counts[stage]
+            counts['calls'] += 1
+            counts['seconds'] += seconds
+            if not ok:
+                counts['errors'] += 1
+
+    def summary(self, elapsed):
+        """Per-stage counters plus throughput over `elapsed` seconds"""
+        with self._lock:
+            return {
+                stage: dict(
+                    counts,
+                    per_second=counts['calls'] / elapsed if elapsed else 0.0,
+                    mean_seconds=counts['seconds'] / counts['calls'] if counts['calls'] else 0.0
+                )
+                for stage, counts in self.counts.items()
+            }
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+
+class BatchPipeline:
+    """Runs records through the analysis stages with a concurrency cap per stage"""
+
+    def __init__(self, llm, tavily_client, concurrency, crawl=False, use_cache=True, deadline=None):
+        self.llm = llm
+        self.tavily_client = tavily_client
+        self.crawl = crawl
+        self.use_cache = use_cache
+        self.deadline = deadline
+        self.concurrency = dict(concurrency)
+        self.stats = StageStats()
+        self._slots = {stage: threading.BoundedSemaphore(concurrency[stage]) for stage in STAGES}
+
+    def _run_stage(self, stage, func, *args, **kwargs):
+        """Call `func` holding one of the stage's slots; a falsy result counts as an error"""
+        with self._slots[stage]:
+            start = time.perf_counter()
+            try:
+                with deadline_stage(stage):
+                    result = func(*args, **kwargs)
+            except Exception:
+                logger.exception("Stage %s failed", stage)
+                result = None
+            self.stats.record(stage, time.perf_counter() - start, bool(result))
+        return result
+
+    def _scrape(self, url):
+        if self.crawl:
+            return merge_page_texts(crawl_website(url))
+        return scrape_website_content(url)
+
+    def process(self, record):
+        """Run one record through all stages and return its output row
+
+        Under a per-record deadline, a record that ran out of time gets a
+        'deadline' error alongside those of the stages it cut short.
+        """
+        with deadline_scope(self.deadline) if self.deadline else nullcontext() as deadline:
+            row = self._process(record)
+        if deadline is not None and deadline.expired:
+            row['errors'].append('deadline')
+        return row
+
+    def _process(self, record):
+        row = {'id': record_id(record), 'input': record, 'errors': []}
+        url = record.get('url') or record.get('business_website') or ''
+
+        if record.get('business_name') and record.get('business_industry'):
+            business_data = {
+                'business_name': record.get('business_name', ''),
+                'business_description': record.get('business_description', ''),
+                'business_website': url,
+                'business_industry': record.get('business_industry', '')
+            }
+        elif url:
+            content = self._run_stage('scrape', self._scrape, url)
+            if not content:
+                row['errors'].append('scrape')
+                return row
+            business_data = self._run_stage(
+                'extract', extract_business_info_from_website, content, url, self.llm, use_cache=self.use_cache
+            )
+            if not business_data:
+                row['errors'].append('extract')
+                return row
+        else:
+            row['errors'].append('input')
+            return row
+
+        row['business_data'] = business_data
+
+        row['recommendations'] = self._run_stage(
+            'recommend', generate_recommendations, business_data, self.llm, use_cache=self.use_cache
+        ) or []
+        if not row['recommendations']:
+            row['errors'].append('recommend')
+
+        row['competitors'] = self._run_stage(
+            'competitors', search_competitors, business_data, self.tavily_client
+        ) or []
+        if not row['competitors']:
+            row['errors'].append('competitors')
+
+        return row
+
+def run_batch(input_path, output_path, pipeline, progress_every=25, retry_failed=False):
+    """Process every record of `input_path` not yet in `output_path`
+
+    With `retry_failed`, records whose last row in `output_path` has errors
+    are processed again too.
+    """
+    done = completed_ids(output_path, retry_failed)
+    records = [record for record in read_records(input_path) if record_id(record) not in done]
+    logger.info("%d records to process, %d already done", len(records), len(done))
+
+    write_lock = threading.Lock()
+    written = 0
+    start = time.monotonic()
+
+    # Enough workers to keep every stage's slots busy at once
+    max_workers = max(sum(pipeline.concurrency.values()), 1)
+
+    with open(output_path, 'a', encoding='utf-8') as out, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def handle(record):
+            nonlocal written
+            row = pipeline.process(record)
+            with write_lock:
+                out.write(json.dumps(row) + '\n')
+                out.flush()
+                written += 1
+                if written % progress_every == 0:
+                    logger.info("%d/%d records written", written, len(records))
+
+        try:
+            for future in [executor.submit(handle, record) for record in records]:
+                future.result()
+        except KeyboardInterrupt:
+            logger.warning("Interrupted; rerun with the same output file to resume")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    elapsed = time.monotonic() - start
+    return {
+        'records': written,
+        'seconds': elapsed,
+        'stages': pipeline.stats.summary(elapsed),
+        'deadlines': deadline_stats.summary(),
+        'spans': telemetry.summary(),
+        # API limiter queues and waits, cache hit ratios and coalesced calls
+        'gauges': telemetry.gauges()
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyse businesses from a CSV or JSONL file")
+    parser.add_argument("input", help="CSV or JSONL file of URLs or manual business records")
+    parser.add_argument("output", help="JSONL results file, also used to resume")
+    parser.add_argument("--scrape-concurrency", type=int, default=8)
+    parser.add_argument("--extract-concurrency", type=int, default=4)
+    parser.add_argument("--recommend-concurrency", type=int, default=4)
+    parser.add_argument("--competitors-concurrency", type=int, default=4)
+    parser.add_argument("--crawl", action="store_true", help="crawl about/services pages, not just the given URL")
+    parser.add_argument("--no-cache", action="store_true", help="bypass the LLM response cache")
+    parser.add_argument("--deadline", type=float, help="seconds each record may take end to end")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="when resuming, rerun records whose output row lists errors")
+    parser.add_argument("--metrics", metavar="PATH", help="write step timings, tokens and cost here in Prometheus text format")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    llm, tavily_client = initialize_apis()
+    pipeline = BatchPipeline(
+        llm,
+        tavily_client,
+        concurrency={
+            'scrape': args.scrape_concurrency,
+            'extract': args.extract_concurrency,
+            'recommend': args.recommend_concurrency,
+            'competitors': args.competitors_concurrency
+        },
+        crawl=args.crawl,
+        use_cache=not args.no_cache,
+        deadline=args.deadline
+    )
+    summary = run_batch(args.input, args.output, pipeline, retry_failed=args.retry_failed)
+    if args.metrics:
+        telemetry.write_prometheus(args.metrics)
+    json.dump(summary, sys.stderr, indent=2)
+    sys.stderr.write('\n')
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Compare relevance-ranked content selection against plain truncation
+
+For every page in fixtures/sites this reports the prompt size (approximate
+tokens) of the old "first 8000 characters" content and of select_content,
+how many of the page's key phrases each one keeps, and whether each still
+contains the evidence for the expected fields: the business name and a word
+of the industry. With --llm it also runs the extraction prompt on both and
+compares the extracted fields with the expected ones (needs OPENAI_API_KEY).
+
+The fixtures cover two shapes of site: pages from one generated template
+with mega-menus, repeated cards and testimonials, and hand-written pages
+modelled on real ones, with cookie banners, long footers in plain divs,
+"what we do" text in divs rather than paragraphs, and a hero h1 that is
+only a slogan.
+
+Run from the repository root:
+
+    python -m benchmarks.content_selection [--llm]
+"""
+import argparse
+import json
+import os
+
+from utils import (
+    SCRAPE_READ_CHARS,
+    VisibleTextParser,
+    estimate_tokens,
+    extract_business_info_from_website,
+    select_content
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "sites")
+
+# What scrape_website_content used to keep
+TRUNCATE_CHARS = 8000
+
+def load_corpus():
+    """Yield (slug, html, expected) for every fixture page"""
+    with open(os.path.join(FIXTURES_DIR, "expected.json")) as f:
+        expected = json.load(f)
+    for slug in sorted(expected):
+        with open(os.path.join(FIXTURES_DIR, slug + ".html"), encoding="utf-8") as f:
+            yield slug, f.read(), expected[slug]
+
+def phrase_recall(text, phrases):
+    """Fraction of `phrases` found in `text`"""
+    lowered = text.lower()
+    return sum(phrase.lower() in lowered for phrase in phrases) / len(phrases)
+
+def industry_words(industry):
+    """Words of an expected industry, e.g. {"financial", "software", "saas"}"""
+    return {word.strip('/&(),.').lower() for word in industry.split()} - {''}
+
+def field_evidence(text, expected):
+    """Whether `text` still names the business and mentions its industry"""
+    lowered = text.lower()
+    return {
+        'business_name': expected['business_name'].lower().rstrip('.') in lowered,
+        'business_industry': any(word in lowered for word in industry_words(expected['business_industry']))
+    }
+
+def field_matches(extracted, expected):
+    """Compare extracted business fields with the expected ones"""
+    if not extracted:
+        return {'business_name': False, 'business_industry': False}
+    name = extracted['business_name'].lower()
+    industry = extracted['business_industry'].lower()
+    return {
+        'business_name': expected['business_name'].lower().rstrip('.') in name,
+        'business_industry': any(word in industry for word in industry_words(expected['business_industry']))
+    }
+
+def run(use_llm=False):
+    llm = None
+    if use_llm:
+        from langchain_openai import ChatOpenAI
+        llm = ChatOpenAI(model="gpt-4o-mini", api_key=os.environ["OPENAI_API_KEY"], temperature=0)
+
+    pages = []
+    for slug, html, expected in load_corpus():
+        parser = VisibleTextParser(SCRAPE_READ_CHARS)
+        parser.feed(html)
+        parser.close()
+
+        truncated = ' '.join(block['text'] for block in parser.blocks)[:TRUNCATE_CHARS]
+        selected = select_content(parser.blocks)
+
+        page = {'page': slug}
+        for label, content in (('truncated', truncated), ('selected', selected)):
+            page[label] = {
+                'tokens': estimate_tokens(content),
+                'key_phrase_recall': phrase_recall(content, expected['key_phrases']),
+                'field_evidence': field_evidence(content, expected)
+            }
+            if llm is not None:
+                extracted = extract_business_info_from_website(content, f"https://{slug}.example", llm, use_cache=False)
+                page[label]['fields'] = field_matches(extracted, expected)
+        pages.append(page)
+
+    totals = {}
+    for label in ('truncated', 'selected'):
+        totals[label] = {
+            'tokens': sum(page[label]['tokens'] for page in pages),
+            'key_phrase_recall': sum(page[label]['key_phrase_recall'] for page in pages) / len(pages),
+            'field_evidence': sum(all(page[label]['field_evidence'].values()) for page in pages) / len(pages)
+        }
+        if llm is not None:
+            totals[label]['fields_correct'] = sum(all(page[label]['fields'].values()) for page in pages) / len(pages)
+    totals['token_reduction'] = 1 - totals['selected']['tokens'] / totals['truncated']['tokens']
+    return {'pages': pages, 'totals': totals}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm", action="store_true", help="also compare extracted fields using the OpenAI API")
+    args = parser.parse_args()
+    print(json.dumps(run(use_llm=args.llm), indent=2))
+
+if __name__ == "__main__":
+    main()
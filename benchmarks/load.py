@@ -0,0 +1,286 @@
+"""Load test: many concurrent app sessions against stubbed backends
+
+Drives simulated users through the four-tab workflow of app.py with
+Streamlit's app-testing API, one AppTest per session, all in this process
+so they share the job pool, caches and rate limiters as real sessions on
+one server do. The APIs are replaced by the stand-ins of
+benchmarks/standins.py with injected latency, and websites are served from
+localhost, so nothing is spent and no network is needed.
+
+Each session:
+
+    load       first run of the app
+    extract    import from a website, until the extracted info shows
+    recommend  generate recommendations, until they show
+    apply      apply the first recommendation
+    logo       generate a logo
+    compete    search for competitors (without profiling), until the table shows
+
+AppTest swaps process-wide Streamlit state (the runtime, st.secrets) in
+and out around each script run, so script runs are serialised with a
+lock. On a real server the GIL serialises most of that CPU work too, while
+the background jobs, where the API latency is spent, overlap freely here
+as there. Time spent waiting for the lock counts as latency.
+
+Every session uses its own URL, so LLM prompts are not answered from
+another session's cache; competitor searches for the same industry share
+the search cache and competitor index, as in production.
+
+For each concurrency level the report gives p50/p95/p99 latency per
+interaction and for the whole workflow, workflows per minute, and memory
+per session: the process RSS growth divided by the sessions, and the
+pickled size of a session's st.session_state. The saturation point is the
+first level whose workflow p95 exceeds --saturation-factor times that of
+the lowest level, or whose throughput no longer grows.
+
+Run from the repository root:
+
+    python -m benchmarks.load --sessions 1 4 8 16 32 --llm-latency 0.5 --tokens-per-second 50
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import resource
+import tempfile
+import threading
+import time
+
+# Before utils is imported: keep the caches out of .cache, in a directory
+# removed when the run ends, and don't let the real API rate limits throttle
+# the stand-ins
+if "APP_CACHE_DIR" not in os.environ:
+    _cache_dir = tempfile.TemporaryDirectory(prefix="load-test-cache-", ignore_cleanup_errors=True)
+    os.environ["APP_CACHE_DIR"] = _cache_dir.name
+os.environ.setdefault("OPENAI_RPM", "1000000")
+os.environ.setdefault("OPENAI_TPM", "1000000000")
+os.environ.setdefault("TAVILY_RPM", "1000000")
+
+from streamlit.testing.v1 import AppTest
+
+import utils
+from benchmarks.pipeline import PERCENTILES, percentile
+from benchmarks.standins import CorpusServer, FakeChatModel, FakeTavilyClient
+from jobs import job_manager
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+INTERACTIONS = ("load", "extract", "recommend", "apply", "logo", "compete")
+
+# Longest a single interaction may take before the session gives up
+INTERACTION_TIMEOUT = 120
+
+# Seconds between checks on a running background job
+POLL_INTERVAL = 0.05
+
+# AppTest script runs are not thread-safe; see above
+_script_lock = threading.Lock()
+
+class SerializedAppTest(AppTest):
+    """AppTest whose script runs take turns"""
+
+    def _run(self, widget_state=None, timeout=None):
+        with _script_lock:
+            return super()._run(widget_state, timeout)
+
+def rss_bytes():
+    """Current resident set size of this process"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        # Peak rather than current RSS, in KiB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# =============================================================================
+# SIMULATED SESSION
+# =============================================================================
+
+class SimulatedSession:
+    """One user clicking through the workflow in its own AppTest"""
+
+    def __init__(self, number, url):
+        self.number = number
+        self.url = url
+        self.app = SerializedAppTest(APP_PATH, default_timeout=INTERACTION_TIMEOUT)
+        self.app.secrets['OPENAI_API_KEY'] = 'load-test'
+        self.timings = {}
+        self.error = None
+
+    def run(self):
+        try:
+            for interaction in INTERACTIONS:
+                start = time.perf_counter()
+                getattr(self, interaction)()
+                if self.app.exception:
+                    raise RuntimeError(f"{interaction}: {self.app.exception[0].value}")
+                self.timings[interaction] = time.perf_counter() - start
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+    def state_bytes(self):
+        """Pickled size of the session's state"""
+        state = self.app.session_state.filtered_state
+        return len(pickle.dumps({key: value for key, value in state.items() if _picklable(value)}))
+
+    def _button(self, label):
+        return next(button for button in self.app.button if button.label == label)
+
+    def _wait_for_job(self, state_key):
+        """Wait for the session's background job, then rerun to show its result"""
+        deadline = time.monotonic() + INTERACTION_TIMEOUT
+        job = job_manager.get(self.app.session_state[state_key])
+        while job is not None and job.active:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"{state_key} still running")
+            time.sleep(POLL_INTERVAL)
+        self.app.run()
+
+    def _tab(self, label):
+        self.app.radio(key="active_tab").set_value(label).run()
+
+    def load(self):
+        self.app.run()
+
+    def extract(self):
+        self._button("🌐 Import from Website").click().run()
+        self.app.text_input[0].input(self.url).run()
+        self._button("🔍 Extract Business Information").click().run()
+        self._wait_for_job('extraction_job')
+        if not self.app.success:
+            raise RuntimeError("extraction did not succeed")
+
+    def recommend(self):
+        self._tab("💡 Recommendations")
+        self._button("🎯 Generate Recommendations").click().run()
+        self._wait_for_job('recommendations_job')
+
+    def apply(self):
+        self.app.button(key="apply_0").click().run()
+
+    def logo(self):
+        self._tab("🎨 Logo Generation")
+        self._button("🎨 Generate Logo").click().run()
+
+    def compete(self):
+        self._tab("🔍 Competitor Analysis")
+        next(box for box in self.app.checkbox if box.label == "🔬 Profile competitor websites").uncheck().run()
+        self._button("🔍 Search for Competitors").click().run()
+        self._wait_for_job('competitors_job')
+
+def _picklable(value):
+    try:
+        pickle.dumps(value)
+        return True
+    except Exception:
+        return False
+
+# =============================================================================
+# LOAD LEVELS
+# =============================================================================
+
+def run_level(server, sessions, offset):
+    """Run `sessions` simulated users at once and summarise their timings"""
+    slugs = server.slugs
+    users = [
+        SimulatedSession(number, server.url(slugs[number % len(slugs)]) + f"user-{number}/")
+        for number in range(offset, offset + sessions)
+    ]
+    rss_before = rss_bytes()
+    threads = [threading.Thread(target=user.run) for user in users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    rss_after = rss_bytes()
+
+    completed = [user for user in users if user.error is None]
+    report = {'sessions': sessions, 'completed': len(completed), 'seconds': round(elapsed, 2)}
+    if not completed:
+        report['errors'] = sorted({user.error for user in users})
+        return report
+
+    latencies = {}
+    for interaction in INTERACTIONS + ('workflow',):
+        values = sorted(
+            sum(user.timings.values()) if interaction == 'workflow' else user.timings[interaction]
+            for user in completed
+        )
+        latencies[interaction] = {f'p{pct}_ms': round(percentile(values, pct) * 1000, 1) for pct in PERCENTILES}
+    report['latency'] = latencies
+    report['workflows_per_minute'] = round(len(completed) / elapsed * 60, 1)
+    report['rss_per_session_mb'] = round((rss_after - rss_before) / sessions / 2 ** 20, 2)
+    report['state_bytes_per_session'] = round(sum(user.state_bytes() for user in completed) / len(completed))
+    if len(completed) < sessions:
+        report['errors'] = sorted({user.error for user in users if user.error})
+    return report
+
+def saturation_point(levels, factor):
+    """First session count where latency blows up or throughput stops growing"""
+    measured = [level for level in levels if 'latency' in level]
+    if not measured:
+        return None
+    base_p95 = measured[0]['latency']['workflow']['p95_ms']
+    for previous, level in zip(measured, measured[1:]):
+        if level['latency']['workflow']['p95_ms'] > base_p95 * factor:
+            return level['sessions']
+        if level['workflows_per_minute'] <= previous['workflows_per_minute']:
+            return level['sessions']
+    return None
+
+def run(levels, llm_latency, tokens_per_second, search_latency, site_latency, saturation_factor):
+    llm = FakeChatModel(latency=llm_latency, tokens_per_second=tokens_per_second)
+    tavily_client = FakeTavilyClient(latency=search_latency)
+    # app.py imports initialize_apis from utils on every run, so this reaches every session
+    utils.initialize_apis = lambda *args, **kwargs: (llm, tavily_client)
+
+    reports = []
+    with CorpusServer(latency=site_latency) as server:
+        # One untimed session first, so imports and first-use setup don't count as per-session memory
+        run_level(server, 1, 0)
+        offset = 1
+        for sessions in levels:
+            logging.getLogger("load").info("Running %d sessions", sessions)
+            reports.append(run_level(server, sessions, offset))
+            offset += sessions
+    return {
+        'settings': {
+            'llm_latency': llm_latency,
+            'tokens_per_second': tokens_per_second,
+            'search_latency': search_latency,
+            'site_latency': site_latency
+        },
+        'levels': reports,
+        'saturation_sessions': saturation_point(reports, saturation_factor)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16],
+                        help="concurrent sessions per level, run in this order")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before the fake model's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=100.0, help="fake model token rate, 0 for instant")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="seconds per fake Tavily search")
+    parser.add_argument("--site-latency", type=float, default=0.05, help="seconds before each page response")
+    parser.add_argument("--saturation-factor", type=float, default=2.0,
+                        help="workflow p95 growth over the lowest level that counts as saturated")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger("load").setLevel(logging.INFO)
+
+    report = run(
+        args.sessions, args.llm_latency, args.tokens_per_second,
+        args.search_latency, args.site_latency, args.saturation_factor
+    )
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""Throughput and precision of competitor name extraction
+
+Generates search results in the shapes Tavily returns for competitor
+queries (business homepages, directory pages and listicles), with known
+business names, and runs them through the old per-result regex extractor
+and the batch NameExtractor. Reports results per second, best of
+`--repeat` runs, and how many of the known names each one finds, and what
+share of its output they are.
+
+The synthetic results are built from the same patterns the extractor
+looks for, so their precision says little. fixtures/search_results.json
+holds hand-labelled results shaped like real Tavily responses (Yelp and
+G2 listings, market reports, stock quotes, homepages), grouped by the
+business searched for; precision and recall on those are reported too.
+
+Run from the repository root:
+
+    python -m benchmarks.name_extraction [--results 1000 10000 100000] [--repeat 3]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from name_extraction import NameExtractor, normalize_name
+
+SEARCH_RESULTS = os.path.join(os.path.dirname(__file__), "fixtures", "search_results.json")
+
+FIRST_WORDS = ['Acme', 'Bright', 'Harbor', 'Summit', 'Evergreen', 'Blue', 'Nordic', 'Golden', 'Urban', 'Pioneer',
+               'Cedar', 'Silver', 'Maple', 'Granite', 'Coastal', 'Redwood', 'Lakeside', 'Northstar', 'Oak', 'Crest']
+SECOND_WORDS = ['Dental', 'Ledger', 'Brew', 'Roots', 'Logistics', 'Analytics', 'Studio', 'Health', 'Legal', 'Media']
+THIRD_WORDS = ['Group', 'Partners', 'Labs', 'Works', 'Collective', 'Co', 'Systems', 'Clinic', '', '']
+SUFFIXES = ['Inc.', 'LLC', 'Ltd', 'Pty Ltd', 'GmbH', 'Corp.', '', '', '']
+VERBS = ['provides', 'offers', 'specializes in', 'is known for']
+FILLER = ("Customers across the region rely on a range of services, from planning to delivery, "
+          "with flexible pricing and a friendly team available seven days a week. ")
+
+# =============================================================================
+# SYNTHETIC CORPUS
+# =============================================================================
+
+def business_name(rng):
+    return ' '.join(word for word in (rng.choice(FIRST_WORDS), rng.choice(SECOND_WORDS), rng.choice(THIRD_WORDS)) if word)
+
+def synthetic_results(count, seed=0):
+    """Yield (result, names) pairs, `names` being the businesses the result mentions"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            # A business homepage
+            name = business_name(rng)
+            suffix = rng.choice(SUFFIXES)
+            title = f"{name} {suffix}".strip() + " - " + rng.choice(["Home", "Official Site", "About Us"])
+            content = f"{name} {rng.choice(VERBS)} {rng.choice(SECOND_WORDS).lower()} services. " + FILLER
+            yield {'title': title, 'content': content}, {name}
+        elif kind < 0.8:
+            # A directory or review page naming several businesses
+            names = list(dict.fromkeys(business_name(rng) for _ in range(rng.randint(2, 4))))
+            content = ' '.join(f"{name} {rng.choice(SUFFIXES) or 'Ltd'} is a popular choice." for name in names) + ' ' + FILLER
+            yield {'title': "Best " + rng.choice(SECOND_WORDS) + " Companies Near You | Directory", 'content': content}, set(names)
+        else:
+            # A listicle with no business in its title or content
+            yield {'title': f"Top {rng.randint(5, 20)} {rng.choice(SECOND_WORDS)} Trends for 2025", 'content': FILLER * 2}, set()
+
+# =============================================================================
+# EXTRACTORS
+# =============================================================================
+
+def legacy_extract_business_names(title, content):
+    """The per-result extractor search_competitors used before NameExtractor"""
+    names = []
+    if title:
+        title_clean = re.sub(r'\b(Inc|LLC|Corp|Company|Ltd|Limited)\b', '', title, flags=re.IGNORECASE)
+        title_clean = re.sub(r'[^\w\s]', ' ', title_clean)
+        words = title_clean.split()
+        if len(words) >= 1:
+            for i in range(1, min(4, len(words) + 1)):
+                potential_name = ' '.join(words[:i]).strip()
+                if len(potential_name) > 2 and potential_name.lower() not in ['the', 'and', 'or']:
+                    names.append(potential_name)
+    if content:
+        patterns = [
+            r'([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,2})\s+(?:is|provides|offers|specializes)',
+            r'([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,2})\s+(?:Inc|LLC|Corp|Company|Ltd)',
+        ]
+        for pattern in patterns:
+            for match in re.findall(pattern, content):
+                if len(match) > 2:
+                    names.append(match.strip())
+    return list(set(names))
+
+def run_legacy(results, exclude=None):
+    names = []
+    seen = {exclude.lower()} if exclude else set()
+    for result in results:
+        for name in legacy_extract_business_names(result['title'], result['content']):
+            if name.lower() not in seen:
+                seen.add(name.lower())
+                names.append(name)
+    return names
+
+def run_batch(results, exclude=None):
+    return [candidate['name'] for candidate in NameExtractor().extract(results, exclude=exclude)]
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+
+def measure(extract, results, expected, repeat):
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        names = extract(results)
+        seconds = min(seconds, time.perf_counter() - start)
+    found = {name.lower() for name in names}
+    return {
+        'seconds': round(seconds, 3),
+        'results_per_second': round(len(results) / seconds),
+        'names': len(names),
+        'recall': round(sum(name.lower() in found for name in expected) / len(expected), 3),
+        'precision': round(sum(name.lower() in expected for name in found) / len(found), 3) if found else 0.0
+    }
+
+def score_labelled(extract):
+    """Precision and recall on the labelled search results, names compared by normalize_name"""
+    with open(SEARCH_RESULTS, encoding="utf-8") as f:
+        searches = json.load(f)
+    businesses = {}
+    for search in searches:
+        businesses.setdefault(search['business'], []).extend(search['results'])
+
+    report = {'names': 0, 'correct': 0, 'expected': 0, 'wrong': []}
+    for business, results in businesses.items():
+        expected = {normalize_name(name) for result in results for name in result['names']}
+        found = {}
+        for name in extract(results, exclude=business):
+            found.setdefault(normalize_name(name), name)
+        correct = [key for key in found if key in expected]
+        report['names'] += len(found)
+        report['correct'] += len(correct)
+        report['expected'] += len(expected)
+        report['wrong'] += [name for key, name in found.items() if key not in expected]
+    return {
+        'names': report['names'],
+        'recall': round(report['correct'] / report['expected'], 3),
+        'precision': round(report['correct'] / report['names'], 3) if report['names'] else 0.0,
+        'wrong': report['wrong']
+    }
+
+def run(sizes, repeat):
+    report = {'labelled': {'legacy': score_labelled(run_legacy), 'batch': score_labelled(run_batch)}, 'synthetic': []}
+    for size in sizes:
+        results = []
+        expected = set()
+        for result, names in synthetic_results(size):
+            results.append(result)
+            expected.update(name.lower() for name in names)
+        report['synthetic'].append({
+            'results': size,
+            'legacy': measure(run_legacy, results, expected, repeat),
+            'batch': measure(run_batch, results, expected, repeat)
+        })
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--results", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="synthetic result set sizes to run")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per extractor and size, the fastest is reported")
+    args = parser.parse_args()
+    print(json.dumps(run(args.results, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Latency and throughput of the analysis stages, offline
+
+Runs the stages of utils.py against local stand-ins (benchmarks/standins.py):
+fixture websites served from localhost, a fake chat model with configurable
+latency and token rate, and a fake Tavily client. No API keys or network
+are needed and nothing is spent. The LLM response cache is bypassed and the
+search cache and competitor index live in a throwaway directory, so every
+iteration takes the cold path.
+
+Each stage runs `--iterations` times in a row; the report gives p50, p95 and
+p99 latency in milliseconds and calls per second, as JSON. Save a report as
+a baseline and compare later runs against it to catch regressions:
+
+    python -m benchmarks.pipeline --save-baseline benchmarks/baseline.json
+    python -m benchmarks.pipeline --baseline benchmarks/baseline.json
+
+With --baseline the exit status is 1 if any stage got slower than the
+baseline by more than --tolerance.
+
+Run from the repository root.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+# Before utils is imported: keep the caches out of .cache, in a directory
+# removed when the run ends, and don't let the real API rate limits throttle
+# the stand-ins
+if "APP_CACHE_DIR" not in os.environ:
+    _cache_dir = tempfile.TemporaryDirectory(prefix="benchmark-cache-", ignore_cleanup_errors=True)
+    os.environ["APP_CACHE_DIR"] = _cache_dir.name
+os.environ.setdefault("OPENAI_RPM", "1000000")
+os.environ.setdefault("OPENAI_TPM", "1000000000")
+os.environ.setdefault("TAVILY_RPM", "1000000")
+
+from benchmarks.name_extraction import synthetic_results
+from benchmarks.standins import CorpusServer, FakeChatModel, FakeTavilyClient
+from utils import (
+    extract_business_info_from_website,
+    extract_business_names,
+    generate_recommendations,
+    scrape_website_content,
+    search_competitors
+)
+
+STAGES = ("scrape", "extract", "recommend", "competitors", "names")
+
+PERCENTILES = (50, 95, 99)
+
+# Latency differences below this many milliseconds are noise, not regressions
+NOISE_FLOOR_MS = 0.5
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+def build_stages(server, llm, tavily_client):
+    """Map each stage name to a function running one iteration of it"""
+    slugs = server.slugs
+    pages = {slug: scrape_website_content(server.url(slug)) for slug in slugs}
+    businesses = {
+        slug: extract_business_info_from_website(pages[slug], server.url(slug), llm, use_cache=False)
+        for slug in slugs
+    }
+    results = [result for result, _ in synthetic_results(1000)]
+
+    def scrape(i):
+        return scrape_website_content(server.url(slugs[i % len(slugs)]))
+
+    def extract(i):
+        slug = slugs[i % len(slugs)]
+        return extract_business_info_from_website(pages[slug], server.url(slug), llm, use_cache=False)
+
+    def recommend(i):
+        return generate_recommendations(businesses[slugs[i % len(slugs)]], llm, use_cache=False)
+
+    def competitors(i):
+        # A distinct industry per iteration, so neither the search cache nor the index answers
+        business = dict(businesses[slugs[i % len(slugs)]])
+        business['business_industry'] += f" run{i}"
+        return search_competitors(business, tavily_client)
+
+    def names(i):
+        result = results[i % len(results)]
+        return extract_business_names(result['title'], result['content'])
+
+    return {'scrape': scrape, 'extract': extract, 'recommend': recommend, 'competitors': competitors, 'names': names}
+
+# =============================================================================
+# MEASUREMENT
+# =============================================================================
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def measure(func, iterations, warmup):
+    """Latency percentiles and throughput of `iterations` sequential calls
+
+    'empty' counts calls that returned nothing, e.g. a failed scrape or a
+    search result naming no business.
+    """
+    for i in range(warmup):
+        func(i)
+    latencies = []
+    empty = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        call_start = time.perf_counter()
+        if not func(i):
+            empty += 1
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    report = {f'p{pct}_ms': round(percentile(latencies, pct) * 1000, 3) for pct in PERCENTILES}
+    report['per_second'] = round(iterations / elapsed, 1)
+    report['empty'] = empty
+    return report
+
+def run(iterations, warmup, llm_latency, tokens_per_second, search_latency, site_latency, stages=STAGES):
+    settings = {
+        'iterations': iterations,
+        'llm_latency': llm_latency,
+        'tokens_per_second': tokens_per_second,
+        'search_latency': search_latency,
+        'site_latency': site_latency
+    }
+    llm = FakeChatModel(latency=llm_latency, tokens_per_second=tokens_per_second)
+    tavily_client = FakeTavilyClient(latency=search_latency)
+    with CorpusServer(latency=site_latency) as server:
+        funcs = build_stages(server, llm, tavily_client)
+        return {
+            'settings': settings,
+            'stages': {stage: measure(funcs[stage], iterations, warmup) for stage in stages}
+        }
+
+# =============================================================================
+# BASELINE COMPARISON
+# =============================================================================
+
+def compare(report, baseline, tolerance):
+    """Per-stage ratios to the baseline, and the list of regressions
+
+    A stage regresses when a latency percentile grows, or its throughput
+    shrinks, by more than `tolerance` (0.25 = 25%). Latency changes under
+    NOISE_FLOOR_MS are ignored.
+    """
+    comparison = {'comparable': report['settings'] == baseline.get('settings'), 'stages': {}, 'regressions': []}
+    for stage, current in report['stages'].items():
+        previous = baseline.get('stages', {}).get(stage)
+        if previous is None:
+            continue
+        ratios = {}
+        for metric, value in current.items():
+            if metric == 'empty' or not previous.get(metric):
+                continue
+            ratios[metric] = round(value / previous[metric], 3)
+            if metric == 'per_second':
+                regressed = value < previous[metric] / (1 + tolerance)
+            else:
+                regressed = value > previous[metric] * (1 + tolerance) and value - previous[metric] > NOISE_FLOOR_MS
+            if regressed:
+                comparison['regressions'].append(f"{stage} {metric}: {previous[metric]} -> {value}")
+        comparison['stages'][stage] = ratios
+    return comparison
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per stage")
+    parser.add_argument("--warmup", type=int, default=5, help="untimed calls per stage before timing")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="seconds before the fake model's first token")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="fake model token rate, 0 for instant")
+    parser.add_argument("--search-latency", type=float, default=0.0, help="seconds per fake Tavily search")
+    parser.add_argument("--site-latency", type=float, default=0.0, help="seconds before each page response")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write the report as the new baseline")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a regression, 0.25 = 25%%")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    report = run(
+        args.iterations, args.warmup, args.llm_latency, args.tokens_per_second,
+        args.search_latency, args.site_latency, stages=args.stages
+    )
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f), args.tolerance)
+    print(json.dumps(report, indent=2))
+
+    comparison = report.get('comparison')
+    if comparison:
+        if not comparison['comparable']:
+            print("warning: baseline was recorded with different settings", file=sys.stderr)
+        if comparison['regressions']:
+            print("regressions:\n  " + "\n  ".join(comparison['regressions']), file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
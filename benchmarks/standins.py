@@ -0,0 +1,204 @@
+"""Local stand-ins for the OpenAI chat model, Tavily and target websites
+
+The offline benchmarks run utils.py against these instead of the real
+services, so they cost nothing, need no network and measure this code
+rather than the internet. The chat model and search client answer with
+the shapes the real ones return, after a configurable delay.
+"""
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from benchmarks.name_extraction import synthetic_results
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "sites")
+
+# Characters per token, matching utils.estimate_tokens
+CHARS_PER_TOKEN = 4
+
+def load_expected():
+    """Expected business fields of each fixture site, by slug"""
+    with open(os.path.join(FIXTURES_DIR, "expected.json")) as f:
+        return json.load(f)
+
+# =============================================================================
+# CHAT MODEL
+# =============================================================================
+
+class FakeChatModel:
+    """Answers the app's prompts like ChatOpenAI, with simulated latency
+
+    Each response waits `latency` seconds for its first token, then produces
+    `tokens_per_second` tokens per second (0 for all at once). Responses are
+    built from the prompt, so extraction finds the fixture site's business
+    and recommendations parse into all five categories.
+    """
+
+    model_name = "fake-chat"
+    temperature = 0.0
+
+    def __init__(self, latency=0.0, tokens_per_second=0.0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.expected = load_expected()
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def __call__(self, messages, stop=None, **kwargs):
+        text = self.respond(messages[-1].content)
+        self._count()
+        time.sleep(self.latency + self._generation_time(text))
+        return AIMessage(content=text)
+
+    def stream(self, messages, stop=None, **kwargs):
+        text = self.respond(messages[-1].content)
+        self._count()
+        time.sleep(self.latency)
+        for start in range(0, len(text), CHARS_PER_TOKEN):
+            chunk = text[start:start + CHARS_PER_TOKEN]
+            time.sleep(self._generation_time(chunk))
+            yield AIMessageChunk(content=chunk)
+
+    def _count(self):
+        with self._lock:
+            self.calls += 1
+
+    def _generation_time(self, text):
+        if not self.tokens_per_second:
+            return 0.0
+        return len(text) / CHARS_PER_TOKEN / self.tokens_per_second
+
+    def respond(self, prompt):
+        """Response text for one of the app's prompts"""
+        if "for each of them" in prompt:
+            websites = re.findall(r'Website (\d+): (\S+)', prompt)
+            return '\n'.join(
+                f"{number}. Business Name: {self._business(url)['business_name']} | "
+                f"Business Description: {self._description(url)} | "
+                f"Business Industry: {self._business(url)['business_industry']}"
+                for number, url in websites
+            )
+        if "extract key business information" in prompt:
+            url = re.search(r'Website URL: (\S+)', prompt)
+            business = self._business(url.group(1) if url else '')
+            return (
+                f"Business Name: {business['business_name']}\n"
+                f"Business Description: {self._description(url.group(1) if url else '')}\n"
+                f"Business Industry: {business['business_industry']}"
+            )
+        category = re.search(r'generate one specific (.+?) recommendation', prompt)
+        if category:
+            return f"1. {category.group(1)}|A {category.group(1).lower()} that fits|Matches the audience"
+        return (
+            "1. Tone of Voice|Warm and reassuring|Puts first-time customers at ease\n"
+            "2. Tagline|Care you can count on|Short, memorable and trust-building\n"
+            "3. Logo Style|Minimal wordmark|Reads well at every size\n"
+            "4. Color Scheme|Teal #1A8C8C and sand #F2E3C6|Calm, clean and approachable\n"
+            "5. Font|Inter|Modern, legible and widely available"
+        )
+
+    def _business(self, url):
+        """Expected fields of the fixture site `url` points at, or made-up ones"""
+        slug = urlsplit(url).path.strip('/').split('/')[0]
+        return self.expected.get(slug, {'business_name': 'Example Business', 'business_industry': 'Professional services'})
+
+    def _description(self, url):
+        return f"{self._business(url)['business_name']} serves customers with " + ', '.join(
+            self._business(url).get('key_phrases', ['quality services'])
+        )
+
+# =============================================================================
+# SEARCH CLIENT
+# =============================================================================
+
+class FakeTavilyClient:
+    """Tavily client returning synthetic search results after `latency` seconds
+
+    The same query always gets the same results: business homepages,
+    directory pages and listicles naming made-up businesses, as generated
+    for the name extraction benchmark.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._lock = threading.Lock()
+        self.calls = 0
+
+    def search(self, query, max_results=5, **kwargs):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        results = []
+        for index, (result, names) in enumerate(synthetic_results(max_results, seed=zlib.crc32(query.encode('utf-8')))):
+            name = next(iter(sorted(names)), 'directory')
+            slug = re.sub(r'[^a-z0-9]+', '', name.lower())
+            results.append(dict(result, url=f"https://www.{slug}.example/page-{index}", score=1.0 - index / 100))
+        return {'query': query, 'results': results}
+
+# =============================================================================
+# WEBSITES
+# =============================================================================
+
+class _CorpusHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        corpus = self.server.corpus
+        slug = self.path.strip('/').split('/')[0]
+        html = corpus.pages.get(slug)
+        if corpus.latency:
+            time.sleep(corpus.latency)
+        if html is None:
+            self.send_error(404)
+            return
+        body = html.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class CorpusServer:
+    """Serves the fixture sites over HTTP on localhost
+
+    Each site's page is at /<slug>/, e.g. /ledgerly/; everything else is a
+    404. Use as a context manager:
+
+        with CorpusServer() as server:
+            scrape_website_content(server.url('ledgerly'))
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.pages = {}
+        for slug in load_expected():
+            with open(os.path.join(FIXTURES_DIR, slug + ".html"), encoding="utf-8") as f:
+                self.pages[slug] = f.read()
+        self._server = None
+
+    @property
+    def slugs(self):
+        return sorted(self.pages)
+
+    def url(self, slug):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/{slug}/"
+
+    def __enter__(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _CorpusHandler)
+        self._server.daemon_threads = True
+        self._server.corpus = self
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
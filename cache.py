@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Directory holding the on-disk cache files
+CACHE_DIR = os.environ.get("APP_CACHE_DIR", ".cache")
+
+# =============================================================================
+# CACHE KEYS
+# =============================================================================
+
+def make_key(*parts):
+    """Build a content-addressed cache key from the given parts"""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+# =============================================================================
+# TIERED CACHE
+# =============================================================================
+
+class TieredCache:
+    """Two-tier cache: an in-memory LRU in front of a SQLite file
+
+    Values must be JSON serialisable. Entries older than `ttl` seconds are
+    stale: get() treats them as missing, while lookup() still returns them
+    for up to `max_stale` more seconds so callers can serve them while they
+    refresh. Each tier evicts its least recently used entries once it holds
+    more than its size limit. The SQLite file can be shared by several
+    processes; if it cannot be opened the cache keeps working with the
+    memory tier only.
+    """
+
+    def __init__(self, path, ttl=7 * 24 * 3600, max_memory_items=256, max_disk_items=5000, max_stale=0):
+        self.path = path
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = self._open_db(path)
+
+    def _open_db(self, path):
+        """Open (and create if needed) the SQLite tier"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            # Lets other processes read while one of them writes
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed)")
+            db.commit()
+            return db
+        except (OSError, sqlite3.Error):
+            return None
+
+    def get(self, key):
+        """Return the cached value for `key`, or None if missing or expired"""
+        value, fresh = self.lookup(key)
+        return value if fresh else None
+
+    def lookup(self, key):
+        """Return (value, fresh) for `key`
+
+        `fresh` is False for an entry past its TTL but still within
+        `max_stale`; a missing or expired entry gives (None, False).
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if now - created <= self.ttl + self.max_stale:
+                    self._memory.move_to_end(key)
+                    return self._count(value, now - created <= self.ttl)
+                del self._memory[key]
+
+            if self._db is None:
+                return self._count(None, False)
+
+            try:
+                row = self._db.execute(
+                    "SELECT value, created FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return self._count(None, False)
+                value, created = row
+                if now - created > self.ttl + self.max_stale:
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._db.commit()
+                    return self._count(None, False)
+                self._db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+                self._db.commit()
+            except sqlite3.Error:
+                return self._count(None, False)
+
+            value = json.loads(value)
+            self._remember(key, created, value)
+            return self._count(value, now - created <= self.ttl)
+
+    def set(self, key, value):
+        """Store `value` under `key` in both tiers"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+
+            if self._db is None:
+                return
+
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now)
+                )
+                # Size-based eviction of the least recently used rows
+                self._db.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_items,)
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                pass
+
+    def delete(self, key):
+        """Remove `key` from both tiers"""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def clear(self):
+        """Remove every entry from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM entries")
+                    self._db.commit()
+                except sqlite3.Error:
+                    pass
+
+    def stats(self):
+        """Hit, stale hit and miss counts, plus the hit ratio"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_ratio': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                'memory_items': len(self._memory)
+            }
+
+    def _count(self, value, fresh):
+        """Record the outcome of a lookup and return it"""
+        if value is None:
+            self.misses += 1
+        elif fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return value, fresh
+
+    def _remember(self, key, created, value):
+        """Put an entry in the memory tier, evicting the oldest if full"""
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
@@ -0,0 +1,190 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from name_extraction import normalize_name
+
+# Words that say nothing about which industry a business is in
+INDUSTRY_STOPWORDS = {
+    'a', 'an', 'and', 'the', 'of', 'for', 'in', 'industry', 'industries', 'sector',
+    'service', 'services', 'business', 'businesses', 'company', 'companies'
+}
+
+# =============================================================================
+# NORMALISATION
+# =============================================================================
+
+def industry_terms(industry):
+    """Distinct, lightly stemmed content words of an industry description"""
+    terms = set()
+    for word in re.findall(r'[a-z0-9]+', (industry or '').lower()):
+        if word in INDUSTRY_STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        terms.add(word)
+    return terms
+
+def industry_key(industry):
+    """Order-independent key for an industry, e.g. "clinic dental" for Dental Clinics"""
+    return ' '.join(sorted(industry_terms(industry)))
+
+def name_key(name):
+    """Key identifying one competitor across spellings, e.g. "acme" for Acme Ltd"""
+    return normalize_name(name)
+
+# =============================================================================
+# COMPETITOR INDEX
+# =============================================================================
+
+class CompetitorIndex:
+    """Persistent index of competitors found for each industry
+
+    Competitors are stored once per (industry key, name key) with every name
+    variant seen, their website, description, the search query that found
+    them and when they were last seen. An inverted index from industry terms
+    to competitors lets "Dental" reuse what was found for "Dental Clinics";
+    not the other way round, since a dental lab is no dental clinic. The SQLite file is shared by all sessions and
+    processes; if it cannot be opened, lookups find nothing and adds are
+    ignored.
+    """
+
+    def __init__(self, path, max_age=30 * 24 * 3600):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._db = self._open_db(path)
+
+    def _open_db(self, path):
+        """Open (and create if needed) the index tables"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS competitors ("
+                "id INTEGER PRIMARY KEY, industry_key TEXT NOT NULL, industry TEXT NOT NULL, "
+                "name_key TEXT NOT NULL, name TEXT NOT NULL, variants TEXT NOT NULL, "
+                "website TEXT NOT NULL, description TEXT NOT NULL, source_query TEXT, "
+                "term_count INTEGER NOT NULL, last_seen REAL NOT NULL, "
+                "UNIQUE (industry_key, name_key))"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS industry_terms ("
+                "term TEXT NOT NULL, competitor_id INTEGER NOT NULL, "
+                "PRIMARY KEY (term, competitor_id)) WITHOUT ROWID"
+            )
+            db.commit()
+            return db
+        except (OSError, sqlite3.Error):
+            return None
+
+    def add(self, industry, competitors, source_query=None):
+        """Record competitors found for `industry`, merging with known ones"""
+        key = industry_key(industry)
+        terms = industry_terms(industry)
+        if self._db is None or not key:
+            return
+
+        now = time.time()
+        with self._lock:
+            try:
+                for competitor in competitors:
+                    competitor_key = name_key(competitor['name'])
+                    if not competitor_key:
+                        continue
+                    row = self._db.execute(
+                        "SELECT id, variants, website, description FROM competitors "
+                        "WHERE industry_key = ? AND name_key = ?",
+                        (key, competitor_key)
+                    ).fetchone()
+
+                    names = [competitor['name'], *competitor.get('aliases', [])]
+                    if row is None:
+                        cursor = self._db.execute(
+                            "INSERT INTO competitors (industry_key, industry, name_key, name, variants, "
+                            "website, description, source_query, term_count, last_seen) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (key, industry, competitor_key, competitor['name'], json.dumps(names),
+                             competitor.get('website') or '', competitor.get('description') or '',
+                             source_query, len(terms), now)
+                        )
+                        self._db.executemany(
+                            "INSERT OR IGNORE INTO industry_terms (term, competitor_id) VALUES (?, ?)",
+                            [(term, cursor.lastrowid) for term in terms]
+                        )
+                        continue
+
+                    competitor_id, variants, website, description = row
+                    variants = json.loads(variants)
+                    variants += [name for name in names if name not in variants]
+                    # Keep what we knew when the new sighting has less
+                    self._db.execute(
+                        "UPDATE competitors SET variants = ?, website = ?, description = ?, "
+                        "source_query = COALESCE(?, source_query), last_seen = ? WHERE id = ?",
+                        (json.dumps(variants), competitor.get('website') or website,
+                         competitor.get('description') or description, source_query, now, competitor_id)
+                    )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+
+    def lookup(self, industry, limit=10, exclude=None):
+        """Known competitors in `industry`, best matches first
+
+        A competitor matches when its industry has every term of this one:
+        a broad "Software" entry doesn't answer "Accounting Software".
+        Exact industry-key matches come first, then the industries with the
+        fewest extra terms, most recently seen first. Entries older than
+        `max_age` and the business named `exclude` are left out.
+        """
+        terms = sorted(industry_terms(industry))
+        if self._db is None or not terms:
+            return []
+
+        placeholders = ', '.join('?' for _ in terms)
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT c.name, c.website, c.industry, c.description, c.name_key "
+                    "FROM industry_terms t JOIN competitors c ON c.id = t.competitor_id "
+                    f"WHERE t.term IN ({placeholders}) AND c.last_seen >= ? "
+                    "GROUP BY c.id HAVING COUNT(*) = ? "
+                    "ORDER BY c.industry_key = ? DESC, c.term_count, c.last_seen DESC, c.id",
+                    (*terms, time.time() - self.max_age, len(terms), ' '.join(terms))
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+
+        excluded = name_key(exclude) if exclude else None
+        competitors = []
+        seen = set()
+        for name, website, industry_name, description, competitor_key in rows:
+            # The same company may be indexed under several related industries
+            if competitor_key == excluded or competitor_key in seen:
+                continue
+            seen.add(competitor_key)
+            competitors.append({
+                'name': name,
+                'website': website,
+                'industry': industry_name,
+                'description': description
+            })
+            if len(competitors) >= limit:
+                break
+        return competitors
+
+    def stats(self):
+        """Number of indexed competitors and industries"""
+        if self._db is None:
+            return {'competitors': 0, 'industries': 0}
+        with self._lock:
+            competitors, industries = self._db.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT industry_key) FROM competitors"
+            ).fetchone()
+        return {'competitors': competitors, 'industries': industries}
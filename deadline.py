@@ -0,0 +1,123 @@
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Deadline of the request the current code runs for, if any
+current_deadline = contextvars.ContextVar('current_deadline', default=None)
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before this step could finish"""
+
+# =============================================================================
+# DEADLINES
+# =============================================================================
+
+class Deadline:
+    """A point in time by which a request must be finished"""
+
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left, never negative"""
+        return max(self.expires - time.monotonic(), 0.0)
+
+    @property
+    def expired(self):
+        return time.monotonic() >= self.expires
+
+@contextmanager
+def deadline_scope(seconds):
+    """Run a with-block under a deadline `seconds` from now
+
+    Nested scopes can only shorten the deadline. Work submitted with
+    submit_in_context inherits it, so worker threads see the same deadline
+    as the code that started them.
+    """
+    deadline = Deadline(seconds)
+    outer = current_deadline.get()
+    if outer is not None and outer.expires < deadline.expires:
+        deadline = outer
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+def remaining(default=None):
+    """Seconds left on the current deadline, or `default` if there is none"""
+    deadline = current_deadline.get()
+    return default if deadline is None else deadline.remaining()
+
+def time_left(cap, step='request'):
+    """Timeout for one step: `cap` seconds, cut to what is left of the deadline
+
+    Raises DeadlineExceeded instead of returning a timeout of zero.
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return cap
+    left = deadline.remaining()
+    if left <= 0:
+        raise DeadlineExceeded(f"No time left for {step}")
+    return left if cap is None else min(cap, left)
+
+def check(step='request'):
+    """Raise DeadlineExceeded if the current deadline has passed"""
+    deadline = current_deadline.get()
+    if deadline is not None and deadline.expired:
+        raise DeadlineExceeded(f"No time left for {step}")
+
+# =============================================================================
+# STAGE STATISTICS
+# =============================================================================
+
+class DeadlineStats:
+    """Per-stage run and deadline miss counts, safe to update from threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def record(self, stage, seconds, missed):
+        with self._lock:
+            counts = self.counts.setdefault(stage, {'runs': 0, 'misses': 0, 'seconds': 0.0})
+            counts['runs'] += 1
+            counts['seconds'] += seconds
+            if missed:
+                counts['misses'] += 1
+
+    def summary(self):
+        """Runs, misses, miss rate and mean seconds per stage"""
+        with self._lock:
+            return {
+                stage: dict(
+                    counts,
+                    miss_rate=counts['misses'] / counts['runs'],
+                    mean_seconds=counts['seconds'] / counts['runs']
+                )
+                for stage, counts in self.counts.items()
+            }
+
+# Process-wide, so misses from every session and batch worker add up
+deadline_stats = DeadlineStats()
+
+@contextmanager
+def stage(name):
+    """Time a pipeline stage, counting a miss if it hit the deadline
+
+    A stage misses when DeadlineExceeded escapes it or when it only finished
+    (typically with partial results) after the deadline had passed.
+    """
+    deadline = current_deadline.get()
+    start = time.monotonic()
+    missed = False
+    try:
+        yield
+    except DeadlineExceeded:
+        missed = True
+        raise
+    finally:
+        missed = missed or (deadline is not None and deadline.expired)
+        deadline_stats.record(name, time.monotonic() - start, missed)
@@ -0,0 +1,201 @@
+import os
+import random
+import zlib
+from urllib.parse import urlsplit
+
+from name_extraction import normalize_name
+
+# Second-level labels under which domains are registered, e.g. example.co.uk
+PUBLIC_SECOND_LEVELS = {'co', 'com', 'net', 'org', 'gov', 'ac', 'edu', 'ltd', 'plc', 'ne', 'or'}
+
+# MinHash signature length and its split into LSH bands. With 8 bands of 4
+# rows, names with a shingle Jaccard similarity of about 0.6 or more become
+# candidate pairs, which near_identical() then confirms or rejects
+MINHASH_PERMUTATIONS = 32
+LSH_BANDS = 8
+
+# Near-identical names differ in at most this many letters, and share at least MIN_SHARED_CHARS
+MAX_NAME_EDIT = 2
+MIN_SHARED_CHARS = 4
+
+# Buckets larger than this are only compared neighbour to neighbour
+MAX_BUCKET_PAIRS = 16
+
+# Character n-gram size used to shingle names
+SHINGLE_SIZE = 3
+
+# Longest merged description, in characters
+MAX_DESCRIPTION_CHARS = 400
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+
+# =============================================================================
+# DOMAINS
+# =============================================================================
+
+def registrable_domain(url):
+    """Domain a URL's site is registered under: "https://www.shop.acme.co.uk/x" -> "acme.co.uk"
+
+    Uses a short list of common second-level registries rather than the full
+    public suffix list, which is good enough to tell sites apart.
+    """
+    host = (urlsplit(url or '').hostname or '').rstrip('.')
+    labels = host.split('.')
+    if len(labels) <= 2:
+        return host
+    if labels[-2] in PUBLIC_SECOND_LEVELS and len(labels[-1]) == 2:
+        return '.'.join(labels[-3:])
+    return '.'.join(labels[-2:])
+
+# =============================================================================
+# MINHASH / LSH
+# =============================================================================
+
+def shingles(text):
+    """Character n-grams of `text`, padded so short names still have a few"""
+    padded = f" {text} "
+    if len(padded) <= SHINGLE_SIZE:
+        return {padded}
+    return {padded[i:i + SHINGLE_SIZE] for i in range(len(padded) - SHINGLE_SIZE + 1)}
+
+def minhash(shingle_set):
+    """MinHash signature of a set of shingles"""
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set]
+    return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+def near_identical(a, b):
+    """True if two normalised names differ only by spacing, a plural or a typo
+
+    "bright smile" and "brightsmile", "harbour" and "harbor" qualify;
+    "smile" and "style" or "clinic 1" and "clinic 2" do not. Shingle
+    similarity alone can't tell these apart when the names share a long
+    common part like "dental group".
+    """
+    a, b = a.replace(' ', ''), b.replace(' ', '')
+    prefix = len(os.path.commonprefix([a, b]))
+    a, b = a[prefix:], b[prefix:]
+    suffix = len(os.path.commonprefix([a[::-1], b[::-1]]))
+    a, b = a[:len(a) - suffix], b[:len(b) - suffix]
+    return (
+        len(a) + len(b) <= MAX_NAME_EDIT
+        and prefix + suffix >= MIN_SHARED_CHARS
+        and not any(char.isdigit() for char in a + b)
+    )
+
+def lsh_pairs(signatures):
+    """Index pairs whose signatures agree on at least one LSH band"""
+    rows = MINHASH_PERMUTATIONS // LSH_BANDS
+    pairs = set()
+    for band in range(LSH_BANDS):
+        buckets = {}
+        for index, signature in enumerate(signatures):
+            buckets.setdefault(signature[band * rows:(band + 1) * rows], []).append(index)
+        for members in buckets.values():
+            if len(members) <= MAX_BUCKET_PAIRS:
+                pairs.update((left, right) for i, left in enumerate(members) for right in members[i + 1:])
+            else:
+                # A degenerate bucket; chaining neighbours keeps this linear
+                pairs.update(zip(members, members[1:]))
+    return pairs
+
+class _DisjointSet:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, item):
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # The lower index, i.e. the better ranked competitor, stays the root
+            self.parent[max(a, b)] = min(a, b)
+
+# =============================================================================
+# COMPETITOR MERGING
+# =============================================================================
+
+def merge_competitors(competitors):
+    """Merge competitors that are the same business under different names
+
+    Two entries are merged when their normalised names are equal, when
+    MinHash/LSH finds their names near-identical ("Harbour Dental" and
+    "Harbor Dental"), or when they come from the same site and one name extends
+    the other ("Acme Cloud" and "Acme Cloud Platform" on acme.com). A shared
+    domain on its own is not enough, since directory and review sites list
+    many competitors. Each cluster keeps its best-ranked entry (competitors
+    are expected best first), with the other names as 'aliases' and the
+    distinct descriptions joined. Runs in O(n log n) apart from the LSH
+    candidate checks, so thousands of candidates stay fast.
+    """
+    if not competitors:
+        return []
+
+    keys = [normalize_name(competitor['name']) for competitor in competitors]
+    clusters = _DisjointSet(len(competitors))
+
+    # Same normalised name
+    first_with_key = {}
+    for index, key in enumerate(keys):
+        clusters.union(first_with_key.setdefault(key, index), index)
+
+    # Near-identical names, one representative per distinct key
+    distinct = list(first_with_key.items())
+    signatures = [minhash(shingles(key)) for key, _ in distinct]
+    for left, right in lsh_pairs(signatures):
+        if near_identical(distinct[left][0], distinct[right][0]):
+            clusters.union(distinct[left][1], distinct[right][1])
+
+    # Same site, one name extending the other. In sorted order a name's
+    # extensions follow it, so a stack of the current prefixes finds them all
+    by_domain = {}
+    for index, competitor in enumerate(competitors):
+        domain = registrable_domain(competitor.get('website'))
+        if domain and keys[index]:
+            by_domain.setdefault(domain, []).append(index)
+    for members in by_domain.values():
+        members.sort(key=lambda index: keys[index] + ' ')
+        prefixes = []
+        for index in members:
+            while prefixes and not (keys[index] + ' ').startswith(keys[prefixes[-1]] + ' '):
+                prefixes.pop()
+            if prefixes:
+                clusters.union(prefixes[-1], index)
+            prefixes.append(index)
+
+    grouped = {}
+    for index in range(len(competitors)):
+        grouped.setdefault(clusters.find(index), []).append(index)
+
+    return [_merge_cluster([competitors[index] for index in members]) for members in grouped.values()]
+
+def _merge_cluster(members):
+    """One competitor standing for a cluster, best-ranked member first"""
+    merged = dict(members[0])
+    aliases = []
+    descriptions = []
+    for member in members:
+        if member['name'] != merged['name'] and member['name'] not in aliases:
+            aliases.append(member['name'])
+        description = (member.get('description') or '').strip()
+        if description and description not in descriptions:
+            descriptions.append(description)
+
+    # Prefer a website on the business's own domain over a directory listing
+    first_word = normalize_name(merged['name']).split(' ')[0]
+    for member in members:
+        if first_word and first_word in registrable_domain(member.get('website')):
+            merged['website'] = member['website']
+            break
+
+    merged['aliases'] = aliases
+    merged['description'] = ' '.join(descriptions)[:MAX_DESCRIPTION_CHARS]
+    return merged
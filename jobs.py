@@ -0,0 +1,126 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limit import submit_in_context
+
+# =============================================================================
+# JOBS
+# =============================================================================
+
+class Job:
+    """A long-running operation executing on the job pool
+
+    The worker function receives the job as its first argument and can call
+    report() to publish progress messages and partial results, which the UI
+    reads while the job is running.
+    """
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.message = ''
+        self.partial = []
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.first_partial = None
+        self._lock = threading.Lock()
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def report(self, message=None, partial=None):
+        """Publish a progress message and/or one partial result"""
+        with self._lock:
+            if message is not None:
+                self.message = message
+            if partial is not None:
+                if self.first_partial is None:
+                    self.first_partial = time.time()
+                self.partial.append(partial)
+
+    def snapshot(self):
+        """Consistent copy of the partial results"""
+        with self._lock:
+            return list(self.partial)
+
+    def elapsed(self):
+        """Seconds since the job started, or its total run time once finished"""
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+class JobManager:
+    """Runs jobs on a worker pool that outlives Streamlit reruns and sessions
+
+    Jobs are identified by a key describing the operation and its inputs;
+    submitting a key whose job is still queued or running returns the
+    existing job instead of starting a new one. Finished jobs are kept for
+    `retention` seconds so a rerun can still pick up their result.
+    """
+
+    def __init__(self, max_workers=8, retention=3600):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._jobs = {}
+        self._active = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, func, *args, **kwargs):
+        """Start func(job, *args, **kwargs) unless a job with `key` is already running"""
+        with self._lock:
+            self._prune()
+            job_id = self._active.get(key)
+            if job_id is not None:
+                return self._jobs[job_id]
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key] = job.id
+
+        submit_in_context(self._executor, self._run, job, func, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return the job with `job_id`, or None if unknown or expired"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args, kwargs):
+        job.status = 'running'
+        job.started = time.time()
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = 'done'
+        except Exception as e:
+            job.error = e
+            job.status = 'failed'
+        finally:
+            job.finished = time.time()
+            with self._lock:
+                if self._active.get(job.key) == job.id:
+                    del self._active[job.key]
+
+    def _prune(self):
+        """Forget finished jobs older than the retention period"""
+        cutoff = time.time() - self.retention
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished and job.finished < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """Number of known jobs by status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+            return counts
+
+# Process-wide job pool shared by all sessions
+job_manager = JobManager()
@@ -0,0 +1,255 @@
+import re
+import unicodedata
+
+# Legal-form suffixes, as word sequences with periods removed
+LEGAL_SUFFIXES = (
+    'inc', 'incorporated', 'llc', 'l l c', 'llp', 'lp', 'ltd', 'limited', 'pty ltd',
+    'corp', 'corporation', 'co', 'co ltd', 'company', 'plc', 'gmbh', 'gmbh co kg',
+    'ag', 'sa', 'sarl', 'bv', 'nv', 'srl', 'spa', 'oy', 'ab', 'as', 'kk', 'pvt ltd',
+    'private limited', 'limited liability company'
+)
+
+# Title words that mark listicles and search pages rather than business names
+GENERIC_WORDS = {
+    'the', 'and', 'or', 'a', 'an', 'of', 'in', 'for', 'to', 'with', 'near', 'me', 'my', 'your',
+    'top', 'best', 'list', 'guide', 'how', 'what', 'why', 'who', 'where', 'when', 'vs', 'versus',
+    'review', 'reviews', 'ranking', 'rankings', 'companies', 'company', 'businesses', 'business',
+    'competitors', 'alternatives', 'similar', 'industry', 'home', 'welcome', 'about', 'us'
+}
+
+# Sentence words a capitalised run can start with that are not part of the name
+LEADING_WORDS = {'at', 'our', 'with', 'and', 'or', 'in', 'for', 'by', 'from', 'while', 'today', 'here'}
+
+# Words that open a listicle title ("Top 10 ...", "Best ...")
+LISTICLE_OPENERS = {'top', 'best', 'how', 'what', 'why', 'who', 'where', 'list', 'guide'}
+
+# Title segments are separated by " - ", " | ", ": " and dashes
+_TITLE_SEPARATOR = re.compile(r'\s+[-|–—]\s+|\s*[|:]\s+')
+
+# A word of a business name: letters or digits, possibly joined by & ' . -
+_WORD = re.compile(r"[A-Za-z0-9](?:[\w&'.-]*[\w&])?")
+
+# A run of capitalised words, optionally followed by a verb that introduces a business.
+# A run stops at a word ending in a period, which usually ends a sentence. It
+# starts with [A-Z] and checks the word boundary behind it, rather than opening
+# with \b, so the regex engine can skip ahead to the next capital letter.
+_CAPITALISED_RUN = re.compile(
+    r"([A-Z](?<!\w[A-Z])[\w&'.-]*(?:(?<!\.),?\s+(?:&\s+)?[A-Z][\w&'.-]*){0,5})"
+    r"(?:\s+(is|provides|offers|specializes|specialises)\b)?"
+)
+
+# A comma inside a run, which separates listed names ("Acme Ltd, Bright Labs Inc")
+_LIST_SEPARATOR = re.compile(r',\s+')
+
+# Candidate scores by where the name was found
+TITLE_SCORE = 3
+LEGAL_SUFFIX_SCORE = 2
+VERB_SCORE = 1
+REPEAT_SCORE = 1
+
+# Longest name kept, in words
+MAX_NAME_WORDS = 4
+
+# Markers for a title segment that holds no name: try the next segment, or stop
+_SKIP = object()
+_STOP = object()
+
+# =============================================================================
+# LEGAL SUFFIX TRIE
+# =============================================================================
+
+class LegalSuffixTrie:
+    """Trie of legal-form suffixes, matched backwards from the end of a name
+
+    Words are compared lowercased with periods removed, so "Inc.", "INC"
+    and "L.L.C." all match.
+    """
+
+    def __init__(self, suffixes=LEGAL_SUFFIXES):
+        self.root = {}
+        for suffix in suffixes:
+            node = self.root
+            for word in reversed(suffix.split()):
+                node = node.setdefault(word, {})
+            node[None] = True
+
+    def match(self, words):
+        """Number of trailing `words` forming the longest legal suffix, 0 if none"""
+        node = self.root
+        longest = 0
+        for depth, word in enumerate(reversed(words), 1):
+            node = node.get(word.replace('.', '').lower())
+            if node is None:
+                break
+            if None in node:
+                longest = depth
+        return longest
+
+_legal_suffixes = LegalSuffixTrie()
+
+def normalize_name(name):
+    """Comparable form of a business name, e.g. "acme" for Acmé Corp
+
+    Lowercases, strips accents and punctuation, and drops trailing legal
+    suffixes.
+    """
+    ascii_name = unicodedata.normalize('NFKD', name or '').encode('ascii', 'ignore').decode('ascii')
+    words = re.findall(r'[a-z0-9]+', ascii_name.replace('.', '').lower())
+    suffix = _legal_suffixes.match(words)
+    if suffix and suffix < len(words):
+        words = words[:-suffix]
+    return ' '.join(words)
+
+# =============================================================================
+# NAME EXTRACTION
+# =============================================================================
+
+class NameExtractor:
+    """Extracts candidate business names from a batch of search results
+
+    Each distinct title and content is scanned once, however many results
+    repeat it: a title's leading segment is a strong candidate, and runs of
+    capitalised words in content count when they end in a legal suffix
+    ("Acme Dental Ltd") or are followed by a verb such as "provides".
+    Candidates found repeatedly score higher. The
+    output is ordered by score, then by first appearance, so the same input
+    always gives the same list.
+    """
+
+    def __init__(self, suffixes=LEGAL_SUFFIXES):
+        self.suffixes = LegalSuffixTrie(suffixes)
+
+    def extract(self, results, exclude=None):
+        """Candidates from `results` (dicts with 'title' and 'content')
+
+        Returns dicts with the candidate 'name', its 'score' and the index
+        of the first 'result' it was found in. A candidate matching
+        `exclude` (the business itself) is left out.
+        """
+        candidates = {}
+        excluded = ' '.join(_WORD.findall(exclude)).lower() if exclude else None
+        # Results from overlapping queries repeat titles and content: scan each distinct text once
+        titles = {}
+        contents = {}
+        # The same names recur across results; parse each distinct run of text once
+        parsed = {}
+
+        for index, result in enumerate(results):
+            title = result.get('title') or ''
+            title_found = titles.get(title)
+            if title_found is None:
+                title_found = titles[title] = self._scan_title(title, parsed)
+            content = result.get('content') or ''
+            content_found = contents.get(content)
+            if content_found is None:
+                content_found = contents[content] = self._scan_content(content, parsed)
+            if not content_found:
+                found = title_found
+            elif not title_found:
+                found = content_found
+            else:
+                found = dict(content_found)
+                for key, (name, score) in title_found.items():
+                    if key not in found or found[key][1] < score:
+                        found[key] = (name, score)
+
+            for key, (name, score) in found.items():
+                if key == excluded:
+                    continue
+                candidate = candidates.get(key)
+                if candidate is None:
+                    candidates[key] = {'name': name, 'score': score, 'result': index, 'order': len(candidates)}
+                else:
+                    candidate['score'] = max(candidate['score'], score) + REPEAT_SCORE
+
+        ranked = sorted(candidates.values(), key=lambda candidate: (-candidate['score'], candidate['order']))
+        return [{'name': c['name'], 'score': c['score'], 'result': c['result']} for c in ranked]
+
+    def _scan_title(self, title, parsed):
+        """{key: (name, score)} for the business name leading a result title, if it looks like one"""
+        found = {}
+        # "Home | Acme Dental": skip leading segments that are only generic words
+        for segment in _TITLE_SEPARATOR.split(title, 2) if title else ():
+            candidate = parsed.get(segment)
+            if candidate is None:
+                candidate = parsed[segment] = self._parse_title_segment(segment)
+            if candidate is _STOP:
+                break
+            if candidate is not _SKIP:
+                self._record(found, *candidate)
+                break
+        return found
+
+    def _parse_title_segment(self, segment):
+        """(name, score) for a title segment, _SKIP to try the next one, _STOP to give up"""
+        words = _WORD.findall(segment)
+        if not words or words[0].lower() in LISTICLE_OPENERS or words[0].isdigit():
+            return _STOP
+        suffix = self.suffixes.match(words)
+        if suffix:
+            words = words[:-suffix]
+        if len(words) > MAX_NAME_WORDS:
+            return _STOP
+        name = self._name(words)
+        if name is None:
+            return _SKIP
+        return name, TITLE_SCORE + (LEGAL_SUFFIX_SCORE if suffix else 0)
+
+    def _scan_content(self, content, parsed):
+        """{key: (name, score)} for names introduced by a legal suffix or a verb in result content"""
+        found = {}
+        for match in _CAPITALISED_RUN.findall(content) if content else ():
+            names = parsed.get(match)
+            if names is None:
+                names = parsed[match] = self._parse_run(*match)
+            for name, score in names:
+                self._record(found, name, score)
+        return found
+
+    def _parse_run(self, run, verb):
+        """[(name, score), ...] for a run of capitalised words from content
+
+        A run listing several names ("Acme Ltd, Bright Labs Inc") gives one
+        per comma-separated part, the verb only counting for the last one.
+        """
+        # Most runs are capitalised sentence openers; reject them before tokenising
+        if not verb and ',' not in run and run[run.rfind(' ') + 1:].replace('.', '').lower() not in self.suffixes.root:
+            return ()
+        parts = []
+        for part in _LIST_SEPARATOR.split(run):
+            words = _WORD.findall(part)
+            # "Acme, Inc.": a part that is only a legal suffix belongs to the one before
+            if parts and self.suffixes.match(words) == len(words):
+                parts[-1] += words
+            else:
+                parts.append(words)
+
+        names = []
+        for index, words in enumerate(parts):
+            suffix = self.suffixes.match(words)
+            if suffix:
+                name, score = self._name(words[:-suffix][-MAX_NAME_WORDS:]), LEGAL_SUFFIX_SCORE
+            elif verb and index == len(parts) - 1:
+                name, score = self._name(words[-MAX_NAME_WORDS:]), VERB_SCORE
+            else:
+                name = None
+            if name is not None:
+                names.append((name, score))
+        return names
+
+    @staticmethod
+    def _name(words):
+        """The business name made of `words`, or None if they are generic"""
+        while len(words) > 1 and words[0].lower() in LEADING_WORDS:
+            words = words[1:]
+        if not words or all(word.lower() in GENERIC_WORDS or word.isdigit() for word in words):
+            return None
+        name = ' '.join(words)
+        return name if len(name) > 2 else None
+
+    @staticmethod
+    def _record(found, name, score):
+        """Keep the best score for each name found in one result"""
+        key = name.lower()
+        if key not in found or found[key][1] < score:
+            found[key] = (name, score)
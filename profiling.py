@@ -0,0 +1,124 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+from cache import CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Set APP_PROFILE=1 to profile every rerun; otherwise only sessions opened with ?profile=1 are
+PROFILE_ALWAYS = os.environ.get("APP_PROFILE", "") not in ("", "0")
+
+# Where profiles go, and how many of the latest reruns to keep there
+PROFILE_DIR = os.environ.get("APP_PROFILE_DIR", os.path.join(CACHE_DIR, "profiles"))
+PROFILE_KEEP = int(os.environ.get("APP_PROFILE_KEEP", 50))
+
+# Reruns taking longer than this many seconds are flagged as slow
+RERUN_BUDGET = float(os.environ.get("APP_RERUN_BUDGET", 1.0))
+
+# Functions listed, by cumulative time, in the summary of each profile
+TOP_FUNCTIONS = 15
+
+# The rerun being profiled on this thread, if any
+current_profile = contextvars.ContextVar('current_profile', default=None)
+
+def profiling_requested(query_params):
+    """True if this rerun should be profiled: APP_PROFILE is set or the URL has ?profile=1"""
+    return PROFILE_ALWAYS or query_params.get("profile") == "1"
+
+def rerun_profiled():
+    """True inside profile_rerun()"""
+    return current_profile.get() is not None
+
+def record_handler(name, seconds):
+    """Add a tab handler's wall time to the rerun being profiled, if any"""
+    profile = current_profile.get()
+    if profile is not None:
+        profile['handlers'][name] = profile['handlers'].get(name, 0.0) + seconds
+
+# =============================================================================
+# PROFILING
+# =============================================================================
+
+@contextmanager
+def profile_rerun(name, session=None, directory=PROFILE_DIR, keep=PROFILE_KEEP, budget=RERUN_BUDGET):
+    """Profile the with-block with cProfile as one rerun called `name`
+
+    Writes a .prof file, loadable with pstats or snakeviz, and a .json
+    summary with the elapsed time, the time of each tab handler and the
+    slowest functions to `directory`, keeping the latest `keep` reruns.
+    Reruns over `budget` seconds are logged as warnings and their files
+    are marked "-slow". Only the calling thread is profiled; background
+    jobs are not part of a rerun.
+    """
+    record = {'name': name, 'session': session, 'started': time.time(), 'handlers': {}, 'budget': budget}
+    token = current_profile.set(record)
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        record['profiled'] = True
+    except ValueError:
+        # Another profiler is active (Python 3.12+ allows only one per process); still time the rerun
+        record['profiled'] = False
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['seconds'] = time.perf_counter() - start
+        if record['profiled']:
+            profiler.disable()
+        current_profile.reset(token)
+        record['over_budget'] = record['seconds'] > budget
+        try:
+            path = save_profile(profiler, record, directory, keep)
+        except OSError as e:
+            logger.warning("Could not save the profile of %s: %s", name, e)
+            path = None
+        if record['over_budget']:
+            logger.warning(
+                "Slow rerun: %s took %.2fs, over the %.2fs budget (handlers: %s); profile: %s",
+                name, record['seconds'], budget,
+                ', '.join(f"{handler} {seconds:.2f}s" for handler, seconds in record['handlers'].items()) or 'none',
+                path
+            )
+
+def save_profile(profiler, record, directory, keep):
+    """Write a rerun's .prof and .json files and prune old ones; returns the main file's path"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(record['started']))
+    millis = int(record['started'] * 1000) % 1000
+    base = os.path.join(directory, '-'.join(filter(None, (
+        f"{stamp}.{millis:03d}",
+        record['name'],
+        (record['session'] or '')[:8],
+        f"{record['seconds'] * 1000:.0f}ms",
+        'slow' if record['over_budget'] else ''
+    ))))
+
+    if record['profiled']:
+        profiler.dump_stats(base + '.prof')
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        record['top_functions'] = output.getvalue()
+    with open(base + '.json', 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+
+    prune_profiles(directory, keep)
+    return base + ('.prof' if record['profiled'] else '.json')
+
+def prune_profiles(directory, keep):
+    """Delete all but the latest `keep` reruns' files"""
+    summaries = sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+    for name in summaries[:max(len(summaries) - keep, 0)]:
+        base = os.path.join(directory, name[:-len('.json')])
+        for path in (base + '.json', base + '.prof'):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
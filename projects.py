@@ -0,0 +1,343 @@
+import ipaddress
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+from cache import make_key
+from competitor_index import industry_terms
+from dedupe import registrable_domain
+from name_extraction import normalize_name
+
+# Large results, stored once per distinct content and loaded only when asked for
+ARTIFACT_KINDS = ('recommendations', 'competitors')
+
+# =============================================================================
+# PROJECT IDENTITY
+# =============================================================================
+
+def website_domain(website):
+    """Registrable domain of a website, with or without its scheme, e.g. "acme.com" for www.acme.com"""
+    website = (website or '').strip()
+    if website and '://' not in website:
+        website = f"http://{website}"
+    host = urlsplit(website).hostname or ''
+    try:
+        # A site on an IP address, e.g. during development, has no registrable domain
+        return str(ipaddress.ip_address(host))
+    except ValueError:
+        return registrable_domain(website)
+
+def project_key(business_data):
+    """Key identifying a business across saves: its website's domain, else its name"""
+    domain = website_domain(business_data.get('business_website'))
+    if domain:
+        return f"domain:{domain}"
+    name = normalize_name(business_data.get('business_name') or '')
+    return f"name:{name}" if name else None
+
+def artifact_hash(kind, data):
+    """Content hash of an artifact"""
+    return make_key(kind, data)
+
+def _prefix_range(prefix):
+    """Bounds for an index-friendly prefix match: lower <= value < upper"""
+    return prefix, prefix + '￿'
+
+# =============================================================================
+# PROJECT STORE
+# =============================================================================
+
+class ProjectStore:
+    """Versioned record of every analysed business, in one SQLite file
+
+    A project is one business, identified by its website's domain or, for
+    manual entries, its name. Each save that changes anything adds a
+    version holding the business data, applied recommendations and logo;
+    the recommendations and competitors are artifacts stored once per
+    distinct content, so versions that share them cost nothing extra, and
+    are only read by load_artifact(). Projects can be found by name or
+    domain prefix and by industry. At most `max_versions` versions are kept
+    per project. The file is shared by all sessions and processes; if it
+    cannot be opened, saves are ignored and nothing is found.
+    """
+
+    def __init__(self, path, max_versions=20):
+        self.path = path
+        self.max_versions = max_versions
+        self._lock = threading.Lock()
+        self._db = self._open_db(path)
+
+    def _open_db(self, path):
+        """Open (and create if needed) the project tables"""
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            db = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS projects ("
+                "id INTEGER PRIMARY KEY, project_key TEXT NOT NULL UNIQUE, "
+                "name TEXT NOT NULL, name_key TEXT NOT NULL, domain TEXT NOT NULL, industry TEXT NOT NULL, "
+                "latest_version INTEGER NOT NULL, state_hash TEXT NOT NULL, "
+                "created REAL NOT NULL, updated REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS projects_name ON projects (name_key)")
+            db.execute("CREATE INDEX IF NOT EXISTS projects_domain ON projects (domain)")
+            db.execute("CREATE INDEX IF NOT EXISTS projects_updated ON projects (updated)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS project_terms ("
+                "term TEXT NOT NULL, project_id INTEGER NOT NULL, "
+                "PRIMARY KEY (term, project_id)) WITHOUT ROWID"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS versions ("
+                "project_id INTEGER NOT NULL, version INTEGER NOT NULL, created REAL NOT NULL, "
+                "business_data TEXT NOT NULL, applied_recommendations TEXT NOT NULL, logo_url TEXT, "
+                "artifacts TEXT NOT NULL, "
+                "PRIMARY KEY (project_id, version)) WITHOUT ROWID"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS version_artifacts ("
+                "project_id INTEGER NOT NULL, version INTEGER NOT NULL, hash TEXT NOT NULL, "
+                "PRIMARY KEY (project_id, version, hash)) WITHOUT ROWID"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS version_artifacts_hash ON version_artifacts (hash)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS artifacts ("
+                "hash TEXT PRIMARY KEY, data TEXT NOT NULL) WITHOUT ROWID"
+            )
+            db.commit()
+            return db
+        except (OSError, sqlite3.Error):
+            return None
+
+    def save(self, state, artifact_hashes=None):
+        """Save the app's state as the business's latest version
+
+        `state` holds 'business_data', 'applied_recommendations', 'logo_url'
+        and the ARTIFACT_KINDS. An artifact that was never loaded can be
+        passed by hash in `artifact_hashes` instead. Returns the project id
+        and version, which is the existing one if nothing changed, or None
+        if the state names no business or could not be saved.
+        """
+        business = state.get('business_data') or {}
+        key = project_key(business)
+        if self._db is None or not key:
+            return None
+
+        artifacts = {}
+        for kind in ARTIFACT_KINDS:
+            if artifact_hashes and kind in artifact_hashes:
+                artifacts[kind] = {'hash': artifact_hashes[kind], 'data': None}
+            else:
+                data = state.get(kind) or []
+                artifacts[kind] = {'hash': artifact_hash(kind, data), 'data': data}
+        applied = state.get('applied_recommendations') or {}
+        logo_url = state.get('logo_url')
+        state_hash = make_key(business, applied, logo_url, {kind: a['hash'] for kind, a in artifacts.items()})
+
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT id, latest_version, state_hash FROM projects WHERE project_key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[2] == state_hash:
+                    return {'id': row[0], 'version': row[1]}
+
+                fields = (
+                    business.get('business_name') or '',
+                    normalize_name(business.get('business_name') or ''),
+                    website_domain(business.get('business_website')),
+                    business.get('business_industry') or ''
+                )
+                if row is None:
+                    version = 1
+                    project_id = self._db.execute(
+                        "INSERT INTO projects (project_key, name, name_key, domain, industry, "
+                        "latest_version, state_hash, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, *fields, version, state_hash, now, now)
+                    ).lastrowid
+                else:
+                    project_id, version = row[0], row[1] + 1
+                    self._db.execute(
+                        "UPDATE projects SET name = ?, name_key = ?, domain = ?, industry = ?, "
+                        "latest_version = ?, state_hash = ?, updated = ? WHERE id = ?",
+                        (*fields, version, state_hash, now, project_id)
+                    )
+                    self._db.execute("DELETE FROM project_terms WHERE project_id = ?", (project_id,))
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO project_terms (term, project_id) VALUES (?, ?)",
+                    [(term, project_id) for term in industry_terms(fields[3])]
+                )
+
+                for artifact in artifacts.values():
+                    if artifact['data'] is not None:
+                        self._db.execute(
+                            "INSERT OR IGNORE INTO artifacts (hash, data) VALUES (?, ?)",
+                            (artifact['hash'], json.dumps(artifact['data']))
+                        )
+                    self._db.execute(
+                        "INSERT OR IGNORE INTO version_artifacts (project_id, version, hash) VALUES (?, ?, ?)",
+                        (project_id, version, artifact['hash'])
+                    )
+                summary = {
+                    kind: {'hash': artifact['hash'], 'count': None if artifact['data'] is None else len(artifact['data'])}
+                    for kind, artifact in artifacts.items()
+                }
+                if artifact_hashes:
+                    # Carry the counts of artifacts passed by hash over from the previous version
+                    previous = self._version_artifacts(project_id, version - 1)
+                    for kind, artifact in summary.items():
+                        if artifact['count'] is None and kind in previous and previous[kind]['hash'] == artifact['hash']:
+                            artifact['count'] = previous[kind]['count']
+                self._db.execute(
+                    "INSERT INTO versions (project_id, version, created, business_data, "
+                    "applied_recommendations, logo_url, artifacts) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (project_id, version, now, json.dumps(business), json.dumps(applied), logo_url, json.dumps(summary))
+                )
+                self._prune(project_id, version)
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                return None
+        return {'id': project_id, 'version': version}
+
+    def _version_artifacts(self, project_id, version):
+        row = self._db.execute(
+            "SELECT artifacts FROM versions WHERE project_id = ? AND version = ?", (project_id, version)
+        ).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def _prune(self, project_id, latest_version):
+        """Drop versions beyond max_versions and the artifacts no version uses (lock held)"""
+        oldest_kept = latest_version - self.max_versions + 1
+        if oldest_kept <= 1:
+            return
+        self._db.execute("DELETE FROM versions WHERE project_id = ? AND version < ?", (project_id, oldest_kept))
+        hashes = [row[0] for row in self._db.execute(
+            "SELECT hash FROM version_artifacts WHERE project_id = ? AND version < ?", (project_id, oldest_kept)
+        )]
+        self._db.execute("DELETE FROM version_artifacts WHERE project_id = ? AND version < ?", (project_id, oldest_kept))
+        for artifact in hashes:
+            self._db.execute(
+                "DELETE FROM artifacts WHERE hash = ? "
+                "AND NOT EXISTS (SELECT 1 FROM version_artifacts WHERE hash = ?)",
+                (artifact, artifact)
+            )
+
+    def find(self, text=None, industry=None, limit=20):
+        """Projects whose name or domain starts with `text` and that are in `industry`
+
+        Both filters are optional; matches come most recently updated first.
+        Returns project headers, without any version data.
+        """
+        if self._db is None:
+            return []
+
+        conditions = []
+        params = []
+        if text:
+            name_low, name_high = _prefix_range(normalize_name(text))
+            domain = re.sub(r'^([a-z]+://)?(www\.)?', '', text.strip().lower()).split('/')[0]
+            domain_low, domain_high = _prefix_range(domain)
+            conditions.append("((name_key >= ? AND name_key < ?) OR (domain >= ? AND domain < ?))")
+            params += [name_low, name_high, domain_low, domain_high]
+        terms = sorted(industry_terms(industry)) if industry else []
+        if terms:
+            placeholders = ', '.join('?' for _ in terms)
+            conditions.append(
+                f"id IN (SELECT project_id FROM project_terms WHERE term IN ({placeholders}) "
+                "GROUP BY project_id HAVING COUNT(*) = ?)"
+            )
+            params += [*terms, len(terms)]
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+
+        with self._lock:
+            try:
+                rows = self._db.execute(
+                    "SELECT id, name, domain, industry, latest_version, updated FROM projects "
+                    f"{where}ORDER BY updated DESC LIMIT ?",
+                    (*params, limit)
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+        return [
+            {'id': row[0], 'name': row[1], 'domain': row[2], 'industry': row[3], 'version': row[4], 'updated': row[5]}
+            for row in rows
+        ]
+
+    def load(self, project_id, version=None):
+        """A project version's business data, applied recommendations and logo
+
+        The latest version unless `version` is given. Its 'artifacts' map
+        each kind to the hash and item count of the stored artifact; fetch
+        one with load_artifact(). None if there is no such version.
+        """
+        if self._db is None:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute(
+                    "SELECT p.name, p.domain, p.industry, p.latest_version, v.version, v.created, "
+                    "v.business_data, v.applied_recommendations, v.logo_url, v.artifacts "
+                    "FROM projects p JOIN versions v ON v.project_id = p.id "
+                    "WHERE p.id = ? AND v.version = COALESCE(?, p.latest_version)",
+                    (project_id, version)
+                ).fetchone()
+            except sqlite3.Error:
+                return None
+        if row is None:
+            return None
+        return {
+            'id': project_id,
+            'name': row[0],
+            'domain': row[1],
+            'industry': row[2],
+            'latest_version': row[3],
+            'version': row[4],
+            'created': row[5],
+            'business_data': json.loads(row[6]),
+            'applied_recommendations': json.loads(row[7]),
+            'logo_url': row[8],
+            'artifacts': json.loads(row[9])
+        }
+
+    def load_artifact(self, hash):
+        """The stored artifact with this hash, or None"""
+        if self._db is None:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT data FROM artifacts WHERE hash = ?", (hash,)).fetchone()
+            except sqlite3.Error:
+                return None
+        return json.loads(row[0]) if row else None
+
+    def versions(self, project_id):
+        """(version, created) of a project's kept versions, newest first"""
+        if self._db is None:
+            return []
+        with self._lock:
+            try:
+                return self._db.execute(
+                    "SELECT version, created FROM versions WHERE project_id = ? ORDER BY version DESC",
+                    (project_id,)
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+
+    def stats(self):
+        """Number of projects, kept versions and distinct artifacts"""
+        if self._db is None:
+            return {'projects': 0, 'versions': 0, 'artifacts': 0}
+        with self._lock:
+            projects, = self._db.execute("SELECT COUNT(*) FROM projects").fetchone()
+            versions, = self._db.execute("SELECT COUNT(*) FROM versions").fetchone()
+            artifacts, = self._db.execute("SELECT COUNT(*) FROM artifacts").fetchone()
+        return {'projects': projects, 'versions': versions, 'artifacts': artifacts}
@@ -0,0 +1,253 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from deadline import DeadlineExceeded, current_deadline
+
+# Session the current code runs on behalf of, used for fair queueing
+current_session = contextvars.ContextVar('current_session', default=None)
+
+# HTTP statuses that mean "slow down" or "try again later"
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# =============================================================================
+# ERROR CLASSIFICATION
+# =============================================================================
+
+def error_status(error):
+    """HTTP status carried by an OpenAI or requests exception, if any"""
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+def retry_after(error):
+    """Seconds from an error's Retry-After header, or None"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+# =============================================================================
+# TOKEN BUCKET
+# =============================================================================
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, holding at most a minute's worth"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (0 if they are now)"""
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= min(amount, self.capacity)
+
+# =============================================================================
+# RATE LIMITER
+# =============================================================================
+
+class RateLimiter:
+    """Process-wide limiter for one API
+
+    Callers are admitted when the requests-per-minute and tokens-per-minute
+    buckets allow it and fewer than the current concurrency limit calls are
+    running. The limit adapts AIMD-style: it grows by 1/limit after each
+    success and halves on a 429 or 5xx, and a Retry-After header pauses all
+    admissions for that long. Waiting callers are admitted round-robin by
+    session, so one busy session cannot starve the others.
+    """
+
+    def __init__(self, name, requests_per_minute, tokens_per_minute=None,
+                 max_concurrency=8, min_concurrency=1, max_retries=3, retry_on=()):
+        self.name = name
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.retry_on = tuple(retry_on)
+
+        self._cond = threading.Condition()
+        self._queues = {}
+        self._order = deque()
+        self._paused_until = 0.0
+        self.in_flight = 0
+
+        self.admitted = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    # -------------------------------------------------------------------------
+    # Admission
+    # -------------------------------------------------------------------------
+
+    def _wait_time(self, tokens, now):
+        """Seconds until a call needing `tokens` may start, None if blocked on concurrency"""
+        if self.in_flight >= int(self.limit):
+            return None
+        wait = max(self._paused_until - now, 0.0, self.requests.wait_time(1, now))
+        if self.tokens is not None and tokens:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def acquire(self, tokens=0, session=None):
+        """Block until this caller may start a call; returns the seconds waited
+
+        Raises DeadlineExceeded, giving up its place in the queue, if the
+        current request's deadline passes while waiting.
+        """
+        session = session if session is not None else current_session.get()
+        deadline = current_deadline.get()
+        ticket = object()
+        start = time.monotonic()
+
+        with self._cond:
+            queue = self._queues.setdefault(session, deque())
+            if not queue:
+                self._order.append(session)
+            queue.append(ticket)
+
+            while True:
+                now = time.monotonic()
+                if self._order[0] == session and queue[0] is ticket:
+                    wait = self._wait_time(tokens, now)
+                    if wait == 0.0:
+                        break
+                else:
+                    wait = None
+                if deadline is not None:
+                    if deadline.expired:
+                        self._abandon(session, ticket)
+                        raise DeadlineExceeded(f"Deadline passed waiting for the {self.name} rate limiter")
+                    wait = deadline.remaining() if wait is None else min(wait, deadline.remaining())
+                self._cond.wait(timeout=wait)
+
+            # Admitted: charge the buckets and move this session to the back of the line
+            self.requests.take(1, now)
+            if self.tokens is not None and tokens:
+                self.tokens.take(tokens, now)
+            queue.popleft()
+            self._order.popleft()
+            if queue:
+                self._order.append(session)
+            else:
+                del self._queues[session]
+            self.in_flight += 1
+
+            waited = now - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self._cond.notify_all()
+        return waited
+
+    def _abandon(self, session, ticket):
+        """Remove a waiting caller from its session's queue (lock held)"""
+        queue = self._queues[session]
+        queue.remove(ticket)
+        if not queue:
+            del self._queues[session]
+            self._order.remove(session)
+        self._cond.notify_all()
+
+    def release(self, error=None):
+        """Finish a call, adapting the concurrency limit to how it went"""
+        with self._cond:
+            self.in_flight -= 1
+            status = error_status(error) if error is not None else None
+            if status == 429 or (status is not None and status >= 500):
+                self.throttled += 1
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                delay = retry_after(error)
+                if delay:
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            elif error is None:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, tokens=0, session=None):
+        """Hold one admission for the duration of a with-block, without retries"""
+        self.acquire(tokens, session)
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(error)
+
+    def call(self, func, *args, tokens=0, session=None, **kwargs):
+        """Run func(*args, **kwargs) through the limiter
+
+        Retryable failures (429, 5xx, and the `retry_on` exception types) are
+        retried up to `max_retries` times, waiting for Retry-After when the
+        server sends one and backing off exponentially otherwise. Once the
+        current request's deadline has passed a failure is not retried but
+        raised as DeadlineExceeded.
+        """
+        deadline = current_deadline.get()
+        for attempt in range(self.max_retries + 1):
+            self.acquire(tokens, session)
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self.release(e)
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded(f"Deadline passed calling {self.name}") from e
+                retryable = error_status(e) in RETRYABLE_STATUSES or isinstance(e, self.retry_on)
+                if not retryable or attempt == self.max_retries:
+                    raise
+                # The pause set by release() already covers Retry-After
+                if retry_after(e) is None:
+                    backoff = min(2 ** attempt, 30)
+                    time.sleep(backoff if deadline is None else min(backoff, deadline.remaining()))
+                continue
+            self.release()
+            return result
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    def stats(self):
+        """Queue depth, wait times and the current concurrency limit"""
+        with self._cond:
+            return {
+                'name': self.name,
+                'queue_depth': sum(len(queue) for queue in self._queues.values()),
+                'waiting_sessions': len(self._queues),
+                'in_flight': self.in_flight,
+                'concurrency_limit': round(self.limit, 2),
+                'admitted': self.admitted,
+                'throttled': self.throttled,
+                'mean_wait_seconds': self.total_wait / self.admitted if self.admitted else 0.0,
+                'max_wait_seconds': self.max_wait,
+                'paused_for_seconds': max(self._paused_until - time.monotonic(), 0.0)
+            }
+
+def submit_in_context(executor, func, *args, **kwargs):
+    """executor.submit that carries the caller's context (e.g. its session) into the worker"""
+    return executor.submit(contextvars.copy_context().run, func, *args, **kwargs)
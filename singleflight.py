@@ -0,0 +1,66 @@
+import threading
+
+from deadline import DeadlineExceeded, remaining
+
+# =============================================================================
+# REQUEST COALESCING
+# =============================================================================
+
+class _Call:
+    """One in-flight execution and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution
+
+    The first caller for a key runs the function; callers arriving with the
+    same key while it runs wait and get the same result, or the same
+    exception. A waiter gives up with DeadlineExceeded when its own request
+    deadline passes first. Nothing is cached: once the call finishes, the
+    next caller runs the function again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.collapsed = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """Run func(*args, **kwargs), or join an in-flight run with the same key"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.collapsed += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(remaining()):
+                raise DeadlineExceeded(f"No time left waiting for {key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Counts of executed and collapsed calls, plus calls in flight"""
+        with self._lock:
+            return {'executed': self.executed, 'collapsed': self.collapsed, 'in_flight': len(self._calls)}
@@ -0,0 +1,294 @@
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from rate_limit import current_session
+
+# Span the current code runs inside, recorded as the parent of new spans
+current_span = contextvars.ContextVar('current_span', default=None)
+
+# USD per million prompt and completion tokens, matched by longest model name prefix
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50)
+}
+
+# USD per successful call of the other paid APIs, by span name
+CALL_PRICES = {'search.tavily': 0.008}
+
+# Numeric span attributes that are summed per span name
+SUMMED_ATTRIBUTES = ('bytes', 'prompt_tokens', 'completion_tokens', 'cost_usd')
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Finished spans kept per session for the performance panel
+RECENT_SPANS = 50
+
+# Sessions with their own aggregates; the least recently active are dropped first
+MAX_SESSIONS = 1000
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """Estimated USD cost of a chat completion, 0.0 for unknown models"""
+    for name in sorted(MODEL_PRICES, key=len, reverse=True):
+        if (model or '').startswith(name):
+            prompt_price, completion_price = MODEL_PRICES[name]
+            return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+    return 0.0
+
+# =============================================================================
+# SPANS
+# =============================================================================
+
+class Span:
+    """One timed step: an external call, a parsing pass or a render
+
+    Attributes such as 'bytes' or 'prompt_tokens' are set while the step
+    runs; the summed ones are added up per span name.
+    """
+
+    __slots__ = ('name', 'session', 'parent', 'started', 'seconds', 'error', 'attributes', '_start')
+
+    def __init__(self, name, attributes=None):
+        parent = current_span.get()
+        self.name = name
+        self.session = current_session.get()
+        self.parent = parent.name if parent is not None else None
+        self.started = time.time()
+        self.seconds = None
+        self.error = None
+        self.attributes = dict(attributes or {})
+        self._start = time.perf_counter()
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def add(self, name, amount):
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def elapsed(self):
+        """Seconds since the span started"""
+        return time.perf_counter() - self._start
+
+    def finish(self, error=None):
+        """Stop the clock and record the span; later calls do nothing"""
+        if self.seconds is not None:
+            return
+        self.seconds = time.perf_counter() - self._start
+        if error is not None:
+            self.error = type(error).__name__
+        elif self.name in CALL_PRICES:
+            self.add('cost_usd', CALL_PRICES[self.name])
+        telemetry.record(self)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'session': self.session,
+            'parent': self.parent,
+            'started': self.started,
+            'seconds': self.seconds,
+            'error': self.error,
+            **self.attributes
+        }
+
+@contextmanager
+def span(name, **attributes):
+    """Record the with-block as a span named `name`
+
+    Spans opened inside it, including in work submitted with
+    submit_in_context, record it as their parent. An exception escaping the
+    block marks the span with its type; control flow exceptions such as
+    Streamlit's rerun don't. Generators should use Span and finish()
+    instead, since they can be closed from another context.
+    """
+    current = Span(name, attributes)
+    token = current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.finish(e)
+        raise
+    finally:
+        current_span.reset(token)
+        current.finish()
+
+def record_llm_usage(current, model, prompt_tokens, completion_tokens):
+    """Set a span's token counts and their estimated cost"""
+    current.set(
+        model=model,
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        cost_usd=estimate_cost(model, prompt_tokens, completion_tokens)
+    )
+
+# =============================================================================
+# AGGREGATION
+# =============================================================================
+
+def _new_aggregate():
+    aggregate = {'count': 0, 'errors': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)}
+    aggregate.update((name, 0) for name in SUMMED_ATTRIBUTES)
+    return aggregate
+
+def _add_to(aggregates, finished):
+    aggregate = aggregates.get(finished.name)
+    if aggregate is None:
+        aggregate = aggregates[finished.name] = _new_aggregate()
+    aggregate['count'] += 1
+    aggregate['seconds'] += finished.seconds
+    aggregate['max_seconds'] = max(aggregate['max_seconds'], finished.seconds)
+    if finished.error:
+        aggregate['errors'] += 1
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if finished.seconds <= bound:
+            aggregate['buckets'][index] += 1
+            break
+    for name in SUMMED_ATTRIBUTES:
+        aggregate[name] += finished.attributes.get(name, 0)
+
+def _summarise(aggregates):
+    return {
+        name: dict(
+            {key: value for key, value in aggregate.items() if key != 'buckets'},
+            mean_seconds=aggregate['seconds'] / aggregate['count']
+        )
+        for name, aggregate in sorted(aggregates.items())
+    }
+
+class Telemetry:
+    """Span aggregates per span name, for the process and for each session
+
+    Safe to update from threads. With `jsonl_path`, every finished span is
+    also appended to that file as one JSON object per line, through a
+    handle opened on first use and kept open, and outside the lock that
+    guards the aggregates.
+    """
+
+    def __init__(self, recent=RECENT_SPANS, max_sessions=MAX_SESSIONS, jsonl_path=None):
+        self.recent = recent
+        self.max_sessions = max_sessions
+        self.jsonl_path = jsonl_path
+        self._lock = threading.Lock()
+        self._process = {}
+        self._sessions = OrderedDict()
+        self._jsonl = None
+        self._jsonl_lock = threading.Lock()
+        self._gauges = []
+
+    def record(self, finished):
+        with self._lock:
+            _add_to(self._process, finished)
+            if finished.session is not None:
+                session = self._sessions.get(finished.session)
+                if session is None:
+                    session = self._sessions[finished.session] = {'aggregates': {}, 'recent': deque(maxlen=self.recent)}
+                    if len(self._sessions) > self.max_sessions:
+                        self._sessions.popitem(last=False)
+                else:
+                    self._sessions.move_to_end(finished.session)
+                _add_to(session['aggregates'], finished)
+                session['recent'].append(finished)
+        if self.jsonl_path:
+            self._append_jsonl(json.dumps(finished.to_dict(), default=str) + '\n')
+
+    def _append_jsonl(self, line):
+        """Append one line to the JSONL log; line buffered, so each span is on disk as it finishes"""
+        with self._jsonl_lock:
+            if self._jsonl is None:
+                self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+            self._jsonl.write(line)
+
+    def summary(self, session=None):
+        """Count, errors, time and summed attributes per span name
+
+        For the whole process, or for one session if `session` is given.
+        """
+        with self._lock:
+            if session is None:
+                return _summarise(self._process)
+            entry = self._sessions.get(session)
+            return _summarise(entry['aggregates']) if entry else {}
+
+    def recent_spans(self, session):
+        """A session's latest finished spans as dicts, newest first"""
+        with self._lock:
+            entry = self._sessions.get(session)
+            return [finished.to_dict() for finished in reversed(entry['recent'])] if entry else []
+
+    def export_jsonl(self, session):
+        """A session's recent spans as JSON lines, oldest first"""
+        return ''.join(json.dumps(finished, default=str) + '\n' for finished in reversed(self.recent_spans(session)))
+
+    def add_gauges(self, name, label, collect):
+        """Export the numbers `collect()` returns as gauges app_<name>_<metric>
+
+        `collect` returns {label value: {metric: value}}, such as each rate
+        limiter's stats by limiter name; values that aren't numbers are left
+        out. It is called on every export, so the gauges are current.
+        """
+        self._gauges.append((name, label, collect))
+
+    def gauges(self):
+        """{name: collect()} for every source added with add_gauges"""
+        return {name: collect() for name, _, collect in self._gauges}
+
+    def export_prometheus(self):
+        """Process-wide aggregates and gauges in the Prometheus text exposition format"""
+        with self._lock:
+            aggregates = {name: dict(aggregate, buckets=list(aggregate['buckets'])) for name, aggregate in self._process.items()}
+
+        lines = [
+            "# HELP app_span_seconds Wall time of instrumented steps",
+            "# TYPE app_span_seconds histogram"
+        ]
+        for name, aggregate in sorted(aggregates.items()):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, aggregate['buckets']):
+                cumulative += count
+                lines.append(f'app_span_seconds_bucket{{span="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'app_span_seconds_bucket{{span="{name}",le="+Inf"}} {aggregate["count"]}')
+            lines.append(f'app_span_seconds_sum{{span="{name}"}} {aggregate["seconds"]}')
+            lines.append(f'app_span_seconds_count{{span="{name}"}} {aggregate["count"]}')
+
+        for metric, help_text in (('errors', "Instrumented steps that raised"),) + tuple(
+            (attribute, f"Total {attribute.replace('_', ' ')} of instrumented steps") for attribute in SUMMED_ATTRIBUTES
+        ):
+            lines.append(f"# HELP app_span_{metric}_total {help_text}")
+            lines.append(f"# TYPE app_span_{metric}_total counter")
+            for name, aggregate in sorted(aggregates.items()):
+                lines.append(f'app_span_{metric}_total{{span="{name}"}} {aggregate[metric]}')
+
+        for name, label, collect in self._gauges:
+            metrics = {}
+            for label_value, stats in collect().items():
+                for metric, value in stats.items():
+                    if isinstance(value, (int, float)) and not isinstance(value, bool):
+                        metrics.setdefault(metric, []).append((label_value, value))
+            for metric, values in metrics.items():
+                lines.append(f"# HELP app_{name}_{metric} {metric.replace('_', ' ').capitalize()} per {label}")
+                lines.append(f"# TYPE app_{name}_{metric} gauge")
+                for label_value, value in values:
+                    lines.append(f'app_{name}_{metric}{{{label}="{label_value}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        """Write export_prometheus() to `path`, replacing it atomically
+
+        Suits node_exporter's textfile collector, or any scraper reading files.
+        """
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.export_prometheus())
+        os.replace(tmp_path, path)
+
+# Process-wide, shared by every session, job and batch worker. Set
+# TELEMETRY_JSONL to a file path to log every span to it.
+telemetry = Telemetry(jsonl_path=os.environ.get("TELEMETRY_JSONL") or None)
@@ -0,0 +1,12 @@
+import os
+import sys
+import tempfile
+
+# Before utils is imported: keep the caches out of .cache, and don't let the
+# real API rate limits slow the tests down
+os.environ.setdefault("APP_CACHE_DIR", tempfile.mkdtemp(prefix="test-cache-"))
+os.environ.setdefault("OPENAI_RPM", "1000000")
+os.environ.setdefault("OPENAI_TPM", "1000000000")
+os.environ.setdefault("TAVILY_RPM", "1000000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,91 @@
+import os
+import time
+import uuid
+from dataclasses import replace
+
+import pytest
+from streamlit.runtime.fragment import MemoryFragmentStorage
+from streamlit.testing.v1 import AppTest, local_script_runner
+
+import utils
+from benchmarks.standins import FakeChatModel, FakeTavilyClient
+from jobs import job_manager
+from telemetry import telemetry
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+BUSINESS = {
+    'business_name': 'Acme Robotics',
+    'business_description': 'Warehouse robots for small distributors',
+    'business_website': '',
+    'business_industry': 'Robotics'
+}
+
+class FragmentRuns:
+    """Lets AppTest rerun only the stored fragments, as a widget inside one would
+
+    AppTest gives every run a new script runner, and with it an empty
+    fragment store, and always runs the whole script. This shares one store
+    across runs and, while `only` is set, asks for a fragment-only rerun.
+    """
+
+    def __init__(self, monkeypatch):
+        self.storage = MemoryFragmentStorage()
+        self.only = False
+        monkeypatch.setattr(local_script_runner, 'MemoryFragmentStorage', lambda: self.storage)
+        rerun_data = local_script_runner.RerunData
+        monkeypatch.setattr(local_script_runner, 'RerunData', lambda **kwargs: self._rerun_data(rerun_data, **kwargs))
+
+    def _rerun_data(self, rerun_data, **kwargs):
+        data = rerun_data(**kwargs)
+        if self.only:
+            data = replace(data, fragment_id_queue=list(self.storage._fragments))
+        return data
+
+@pytest.fixture
+def app(monkeypatch):
+    llm = FakeChatModel(latency=0.0, tokens_per_second=0)
+    monkeypatch.setattr(utils, 'initialize_apis', lambda *args, **kwargs: (llm, FakeTavilyClient()))
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.secrets['OPENAI_API_KEY'] = 'test'
+    return at
+
+def wait_for_job(job_id, timeout=10):
+    job = job_manager.get(job_id)
+    deadline = time.monotonic() + timeout
+    while job.active and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return job
+
+def generate_in_fragment(app, monkeypatch):
+    """Click Generate Recommendations in a fragment-only rerun; the session id and the finished job"""
+    fragments = FragmentRuns(monkeypatch)
+    app.run()
+    # A business of its own, so the recommendations aren't in the LLM cache
+    app.session_state['business_data'] = dict(BUSINESS, business_name=f"Acme Robotics {uuid.uuid4().hex[:8]}")
+    app.run()
+    app.radio(key='active_tab').set_value("💡 Recommendations").run()
+    assert len(fragments.storage._fragments) == 1
+
+    # The click reruns only the Recommendations fragment, not the module code
+    fragments.only = True
+    next(button for button in app.button if button.label == "🎯 Generate Recommendations").click().run()
+    assert not app.exception
+
+    job = wait_for_job(app.session_state['recommendations_job'])
+    assert job.status == 'done'
+    return app.session_state['session_id'], job
+
+def test_job_submitted_from_a_fragment_runs_in_the_session(app, monkeypatch):
+    session, job = generate_in_fragment(app, monkeypatch)
+    spans = telemetry.recent_spans(session)
+    assert any(span['name'] == 'llm.stream' and span['session'] == session for span in spans)
+
+def test_performance_panel_counts_fragment_reruns(app, monkeypatch):
+    # The panel shows telemetry.summary(session) and recent_spans(session)
+    session, job = generate_in_fragment(app, monkeypatch)
+    summary = telemetry.summary(session)
+    assert summary['llm.stream']['count'] >= 1
+    assert summary['llm.stream']['prompt_tokens'] > 0
+    assert 'render.handle_recommendations' in summary
+    assert telemetry.summary()['llm.stream']['count'] >= summary['llm.stream']['count']
@@ -0,0 +1,173 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import crawl_website
+
+def page(title, body, links=()):
+    anchors = ''.join(f'<a href="{link}">{link}</a> ' for link in links)
+    return (
+        f"<html><head><title>{title}</title></head><body>"
+        f"<div class='menu'>{anchors}</div><h1>{title}</h1><p>{body}</p></body></html>"
+    )
+
+class FixtureSite:
+    """A small business site on localhost, recording every request
+
+    `pages` maps paths to HTML, or to ('redirect', url). Each response is
+    delayed by `latency` seconds so concurrent requests overlap.
+    """
+
+    def __init__(self, pages, robots='', latency=0.0):
+        self.pages = pages
+        self.robots = robots
+        self.latency = latency
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site._lock:
+                    site.requests.append(self.path)
+                    site.in_flight += 1
+                    site.max_in_flight = max(site.max_in_flight, site.in_flight)
+                try:
+                    time.sleep(site.latency)
+                    self.respond()
+                finally:
+                    with site._lock:
+                        site.in_flight -= 1
+
+            def respond(self):
+                if self.path == '/robots.txt':
+                    self.send(200, 'text/plain', site.robots)
+                    return
+                content = site.pages.get(self.path.split('?')[0])
+                if content is None:
+                    self.send(404, 'text/html', 'Not found')
+                elif isinstance(content, tuple):
+                    self.send_response(302)
+                    self.send_header('Location', content[1])
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                else:
+                    self.send(200, 'text/html; charset=utf-8', content)
+
+            def send(self, status, content_type, text):
+                body = text.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def url(self, path='/'):
+        return f"http://127.0.0.1:{self.server.server_port}{path}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def fetched(self, path):
+        """Requests for `path`, whatever their query string"""
+        return sum(request.split('?')[0] == path for request in self.requests)
+
+@pytest.fixture
+def serve():
+    sites = []
+    
+    def start(pages, **kwargs):
+        site = FixtureSite(pages, **kwargs)
+        sites.append(site)
+        return site
+    yield start
+    for site in sites:
+        site.close()
+
+SECTIONS = ['/about', '/services', '/products', '/pricing', '/company', '/solutions', '/features', '/team']
+
+def section_pages():
+    return {
+        path: page(path.strip('/').title(), f"Acme {path.strip('/')} page: what we do for our customers in {path}.")
+        for path in SECTIONS
+    }
+
+def test_page_budget(serve):
+    site = serve({'/': page("Acme", "Acme makes robots.", SECTIONS), **section_pages()})
+    
+    pages = crawl_website(site.url(), max_pages=3)
+    
+    assert len(pages) == 3
+    assert pages[0]['url'] == site.url()
+    assert 'Acme makes robots' in pages[0]['text']
+
+def test_per_host_limit(serve):
+    site = serve({'/': page("Acme", "Acme makes robots.", SECTIONS), **section_pages()}, latency=0.2)
+    
+    pages = crawl_website(site.url(), max_pages=len(SECTIONS) + 1, per_host=2)
+    
+    assert len(pages) == len(SECTIONS) + 1
+    assert site.max_in_flight == 2
+
+def test_robots_txt_is_honoured(serve):
+    site = serve(
+        {'/': page("Acme", "Acme makes robots.", SECTIONS), **section_pages()},
+        robots="User-agent: *\nDisallow: /pricing\nDisallow: /team\n"
+    )
+    
+    pages = crawl_website(site.url(), max_pages=len(SECTIONS) + 1)
+    
+    assert site.fetched('/robots.txt') == 1
+    assert site.fetched('/pricing') == 0
+    assert site.fetched('/team') == 0
+    assert len(pages) == len(SECTIONS) - 1
+
+def test_dedupe_by_canonical_url_and_content(serve):
+    links = ['/about', '/about/', '/about?b=2&a=1', '/about?a=1&b=2', '/services', '/products']
+    same = page("Our offer", "Acme designs and installs robot cells for factories.")
+    site = serve({
+        '/': page("Acme", "Acme makes robots.", links),
+        '/about': page("About", "Acme was founded in 2011 by two engineers."),
+        '/services': same,
+        '/products': same
+    })
+    
+    pages = crawl_website(site.url(), max_pages=10)
+    
+    texts = [p['text'] for p in pages]
+    assert len(pages) == 3
+    # "/about/" is "/about"; both query orders are one URL, whose page repeats /about
+    assert site.fetched('/about') == 2
+    assert sum('founded in 2011' in text for text in texts) == 1
+    assert sum('robot cells' in text for text in texts) == 1
+
+def test_redirect_off_site_is_dropped(serve):
+    # localhost and 127.0.0.1 are different sites to the crawler
+    elsewhere = serve({'/acme': page("Social", "Follow Acme on our social network.")})
+    site = serve({
+        '/': page("Acme", "Acme makes robots.", ['/about', '/company']),
+        '/about': page("About", "Acme was founded in 2011 by two engineers."),
+        '/company': ('redirect', f"http://localhost:{elsewhere.server.server_port}/acme")
+    })
+    
+    pages = crawl_website(site.url(), max_pages=5)
+    
+    assert elsewhere.fetched('/acme') == 1
+    assert [p['url'] for p in pages] == [site.url(), site.url('/about')]
+
+def test_unreachable_site_gives_no_pages(serve):
+    site = serve({})
+    
+    assert crawl_website(site.url()) == []
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import utils
+from cache import TieredCache
+
+class FakeTavilyClient:
+    """Records each search and answers with one result naming the query"""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def search(self, query, max_results=3, **kwargs):
+        with self._lock:
+            self.calls.append((query, max_results))
+            number = len(self.calls)
+        return {'results': [{'title': f"{query} #{number}", 'url': 'https://example.com', 'content': ''}]}
+
+@pytest.fixture
+def tavily():
+    return FakeTavilyClient()
+
+@pytest.fixture
+def search_cache(tmp_path, monkeypatch):
+    """A fresh, empty search cache in place of the shared one"""
+    cache = TieredCache(str(tmp_path / "search.sqlite3"), ttl=3600, max_stale=3600)
+    monkeypatch.setattr(utils, 'search_cache', cache)
+    return cache
+
+@pytest.fixture
+def revalidate_executor(monkeypatch):
+    """A private executor for background refreshes, so tests can wait for them"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(utils, '_revalidate_executor', executor)
+    yield executor
+    executor.shutdown(wait=True)
+
+def test_miss_searches_and_stores(search_cache, tavily):
+    results = utils.cached_search(tavily, "companies in dental industry")
+    
+    assert tavily.calls == [("companies in dental industry", 3)]
+    assert results['results'][0]['title'] == "companies in dental industry #1"
+    assert search_cache.stats()['misses'] == 1
+
+def test_fresh_hit_skips_search(search_cache, tavily):
+    first = utils.cached_search(tavily, "companies in dental industry")
+    second = utils.cached_search(tavily, "companies in dental industry")
+    
+    assert second == first
+    assert len(tavily.calls) == 1
+    stats = search_cache.stats()
+    assert (stats['hits'], stats['stale_hits'], stats['misses']) == (1, 0, 1)
+    assert stats['hit_ratio'] == 0.5
+
+def test_stale_hit_is_served_and_refreshed_in_background(search_cache, tavily, revalidate_executor):
+    utils.cached_search(tavily, "companies in dental industry")
+    search_cache.ttl = 0
+    
+    stale = utils.cached_search(tavily, "companies in dental industry")
+    assert stale['results'][0]['title'] == "companies in dental industry #1"
+    
+    revalidate_executor.shutdown(wait=True)
+    assert len(tavily.calls) == 2
+    assert search_cache.stats()['stale_hits'] == 1
+    assert not utils._revalidating
+    
+    search_cache.ttl = 3600
+    refreshed = utils.cached_search(tavily, "companies in dental industry")
+    assert refreshed['results'][0]['title'] == "companies in dental industry #2"
+
+def test_expired_entry_is_a_miss(search_cache, tavily):
+    utils.cached_search(tavily, "companies in dental industry")
+    search_cache.ttl = 0
+    search_cache.max_stale = 0
+    
+    utils.cached_search(tavily, "companies in dental industry")
+    assert len(tavily.calls) == 2
+    assert search_cache.stats()['misses'] == 2
+
+def test_queries_are_normalised(search_cache, tavily):
+    utils.cached_search(tavily, "Companies in  Dental industry")
+    utils.cached_search(tavily, "  companies in dental INDUSTRY ")
+    
+    assert len(tavily.calls) == 1
+    assert utils.normalize_query("  Companies\tin  Dental ") == "companies in dental"
+
+def test_max_results_is_part_of_the_key(search_cache, tavily):
+    utils.cached_search(tavily, "companies in dental industry", max_results=3)
+    utils.cached_search(tavily, "companies in dental industry", max_results=10)
+    utils.cached_search(tavily, "companies in dental industry", max_results=3)
+    
+    assert tavily.calls == [("companies in dental industry", 3), ("companies in dental industry", 10)]
+
+def test_use_cache_false_searches_and_replaces_entry(search_cache, tavily):
+    utils.cached_search(tavily, "companies in dental industry")
+    fresh = utils.cached_search(tavily, "companies in dental industry", use_cache=False)
+    cached = utils.cached_search(tavily, "companies in dental industry")
+    
+    assert len(tavily.calls) == 2
+    assert cached == fresh
@@ -0,0 +1,45 @@
+import threading
+import time
+
+import pytest
+
+from deadline import DeadlineExceeded, deadline_scope
+from singleflight import SingleFlight
+
+def start_leader(flight, key, release):
+    """Run a call for `key` in a thread that holds it until `release` is set"""
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 'result'
+
+    thread = threading.Thread(target=flight.do, args=(key, slow))
+    thread.start()
+    started.wait(5)
+    return thread
+
+def test_waiter_gets_the_leader_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = start_leader(flight, 'key', release)
+
+    threading.Timer(0.1, release.set).start()
+    assert flight.do('key', lambda: 'not run') == 'result'
+    leader.join()
+    assert flight.stats() == {'executed': 1, 'collapsed': 1, 'in_flight': 0}
+
+def test_waiter_gives_up_at_its_deadline():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = start_leader(flight, 'key', release)
+
+    try:
+        start = time.monotonic()
+        with deadline_scope(0.2), pytest.raises(DeadlineExceeded):
+            flight.do('key', lambda: 'not run')
+        assert time.monotonic() - start < 2
+    finally:
+        release.set()
+        leader.join()
@@ -0,0 +1,27 @@
+from telemetry import Telemetry
+
+def test_gauges_are_exported_with_their_labels():
+    telemetry = Telemetry()
+    stats = {'openai': {'name': 'openai', 'queue_depth': 0, 'mean_wait_seconds': 0.0}}
+    telemetry.add_gauges('rate_limit', 'limiter', lambda: stats)
+    stats['openai'].update(queue_depth=3, mean_wait_seconds=0.25)
+
+    text = telemetry.export_prometheus()
+    assert '# TYPE app_rate_limit_queue_depth gauge' in text
+    assert 'app_rate_limit_queue_depth{limiter="openai"} 3' in text
+    assert 'app_rate_limit_mean_wait_seconds{limiter="openai"} 0.25' in text
+    assert 'app_rate_limit_name' not in text
+    assert telemetry.gauges() == {'rate_limit': stats}
+
+def test_app_limiters_caches_and_coalescing_are_exported():
+    import utils
+    from telemetry import telemetry
+
+    text = telemetry.export_prometheus()
+    for line in (
+        'app_rate_limit_queue_depth{limiter="openai"}',
+        'app_rate_limit_max_wait_seconds{limiter="tavily"}',
+        'app_cache_hit_ratio{cache="search"}',
+        'app_coalescing_collapsed{path="llm"}'
+    ):
+        assert line in text
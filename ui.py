@@ -0,0 +1,248 @@
+import time
+import uuid
+import streamlit as st
+
+from projects import ARTIFACT_KINDS
+from telemetry import span, telemetry
+from utils import project_store
+
+# Session state saved with each project version
+PROJECT_FIELDS = ('business_data', 'applied_recommendations', 'logo_url') + ARTIFACT_KINDS
+
+# Job ids that belong to the project being replaced when another one is opened
+PROJECT_JOB_KEYS = ('extraction_job', 'recommendations_job', 'regenerate_job', 'competitors_job')
+
+# Saved projects listed in the sidebar
+PROJECTS_LISTED = 20
+
+# =============================================================================
+# SESSION STATE MANAGEMENT
+# =============================================================================
+
+def initialize_session_state():
+    """Initialize all session state variables"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'business_data' not in st.session_state:
+        st.session_state.business_data = {
+            'business_name': '',
+            'business_description': '',
+            'business_website': '',
+            'business_industry': ''
+        }
+    if 'recommendations' not in st.session_state:
+        st.session_state.recommendations = []
+    if 'applied_recommendations' not in st.session_state:
+        st.session_state.applied_recommendations = {
+            'tone_of_voice': '',
+            'tagline': '',
+            'logo_style': '',
+            'color_scheme': '',
+            'font': ''
+        }
+    if 'logo_url' not in st.session_state:
+        st.session_state.logo_url = None
+    if 'competitors' not in st.session_state:
+        st.session_state.competitors = []
+    if 'render_cpu' not in st.session_state:
+        st.session_state.render_cpu = {}
+    if 'pending_artifacts' not in st.session_state:
+        st.session_state.pending_artifacts = {}
+
+# =============================================================================
+# RECOMMENDATIONS
+# =============================================================================
+
+def apply_recommendation(rec_type, recommendation):
+    """Apply a recommendation to the business data"""
+    type_mapping = {
+        'Tone of Voice': 'tone_of_voice',
+        'Tagline': 'tagline',
+        'Logo Style': 'logo_style',
+        'Color Scheme': 'color_scheme',
+        'Font': 'font'
+    }
+    
+    if rec_type in type_mapping:
+        st.session_state.applied_recommendations[type_mapping[rec_type]] = recommendation
+        st.toast(f"Applied {rec_type}: {recommendation}", icon="✅")
+    else:
+        st.toast("Unknown recommendation type", icon="❌")
+
+# =============================================================================
+# UI HELPER FUNCTIONS
+# =============================================================================
+
+def display_business_summary():
+    """Display current business information"""
+    if any(st.session_state.business_data.values()):
+        st.subheader("📄 Current Business Information")
+        
+        data = st.session_state.business_data
+        if data['business_name']:
+            st.write(f"**Business Name:** {data['business_name']}")
+        if data['business_description']:
+            st.write(f"**Description:** {data['business_description']}")
+        if data['business_website']:
+            st.write(f"**Website:** {data['business_website']}")
+        if data['business_industry']:
+            st.write(f"**Industry:** {data['business_industry']}")
+
+def display_applied_recommendations():
+    """Display currently applied recommendations"""
+    applied = st.session_state.applied_recommendations
+    if any(applied.values()):
+        st.subheader("✅ Applied Recommendations")
+        for key, value in applied.items():
+            if value:
+                display_key = key.replace('_', ' ').title()
+                st.write(f"**{display_key}:** {value}")
+
+# =============================================================================
+# PROJECTS
+# =============================================================================
+
+def autosave_project():
+    """Save the session's analysis as the latest version of its business's project"""
+    with span('project.save'):
+        state = {field: st.session_state.get(field) for field in PROJECT_FIELDS}
+        saved = project_store.save(state, artifact_hashes=st.session_state.pending_artifacts)
+    if saved is not None:
+        st.session_state.project = saved
+
+def open_project(project_id, version):
+    """Replace the session's analysis with a saved project version
+
+    Recommendations and competitors stay in the store until their tab is
+    shown; see load_pending_artifact().
+    """
+    with span('project.open'):
+        project = project_store.load(project_id, version)
+    if project is None:
+        st.toast("Could not open that project", icon="❌")
+        return
+    
+    for key in PROJECT_JOB_KEYS + ('recommendation_timing',):
+        st.session_state.pop(key, None)
+    st.session_state.business_data = project['business_data']
+    st.session_state.applied_recommendations = project['applied_recommendations']
+    st.session_state.logo_url = project['logo_url']
+    for kind in ARTIFACT_KINDS:
+        st.session_state[kind] = []
+    st.session_state.pending_artifacts = {kind: artifact['hash'] for kind, artifact in project['artifacts'].items()}
+    st.session_state.project = {'id': project_id, 'version': project['version']}
+    st.toast(f"Opened {project['name'] or project['domain']} (version {project['version']})", icon="📂")
+
+def load_pending_artifact(kind):
+    """Load an opened project's recommendations or competitors the first time they are shown"""
+    artifact = st.session_state.pending_artifacts.pop(kind, None)
+    if artifact is not None:
+        with span('project.artifact', kind=kind):
+            st.session_state[kind] = project_store.load_artifact(artifact) or []
+
+def display_project_browser():
+    """Find a saved project by name, domain or industry and reopen it"""
+    st.subheader("📁 Projects")
+    query = st.text_input("Find a project", key="project_query", placeholder="Business name or domain")
+    industry = st.text_input("Industry", key="project_industry")
+    projects = project_store.find(query, industry, limit=PROJECTS_LISTED)
+    if not projects:
+        st.caption("No matching projects." if query or industry else "No saved projects yet.")
+        return
+    
+    names = {
+        project['id']: ' · '.join(filter(None, (project['name'], project['domain'])))
+        for project in projects
+    }
+    project_id = st.selectbox("Project", list(names), format_func=names.get, key="project_choice")
+    versions = dict(project_store.versions(project_id))
+    version = st.selectbox(
+        "Version",
+        list(versions),
+        format_func=lambda v: f"v{v} · {time.strftime('%Y-%m-%d %H:%M', time.localtime(versions[v]))}",
+        key="project_version"
+    )
+    st.button("📂 Open", on_click=open_project, args=(project_id, version), use_container_width=True)
+
+# =============================================================================
+# PERFORMANCE PANEL
+# =============================================================================
+
+def display_process_gauges():
+    """Display the process-wide gauges: limiter queues, caches, coalescing"""
+    with st.expander("API queues and caches (all sessions)"):
+        for name, stats in telemetry.gauges().items():
+            st.caption(name.replace('_', ' ').capitalize())
+            st.dataframe(
+                [
+                    {'name': label, **{
+                        metric: round(value, 3) if isinstance(value, float) else value
+                        for metric, value in values.items() if metric != 'name'
+                    }}
+                    for label, values in stats.items()
+                ],
+                hide_index=True,
+                use_container_width=True
+            )
+
+@st.experimental_fragment
+def display_performance_panel():
+    """Display this session's step timings, tokens and cost in the sidebar
+
+    Below them, the process-wide API limiter queues, cache hit ratios and
+    coalesced calls, shared by every session. A fragment, so its Refresh
+    button reruns only the panel.
+    """
+    st.subheader("⏱️ Performance")
+    session = st.session_state.session_id
+    display_process_gauges()
+    summary = telemetry.summary(session)
+    if not summary:
+        st.caption("No timed steps yet.")
+        return
+    
+    col1, col2 = st.columns(2)
+    col1.metric("Est. cost", f"${sum(s['cost_usd'] for s in summary.values()):.4f}")
+    col2.metric("Tokens", f"{sum(s['prompt_tokens'] + s['completion_tokens'] for s in summary.values()):,}")
+    
+    st.dataframe(
+        [
+            {
+                'step': name,
+                'calls': stats['count'],
+                'errors': stats['errors'],
+                'mean ms': round(stats['mean_seconds'] * 1000, 1),
+                'max ms': round(stats['max_seconds'] * 1000, 1),
+                'KB': round(stats['bytes'] / 1024, 1),
+                'tokens': stats['prompt_tokens'] + stats['completion_tokens']
+            }
+            for name, stats in summary.items()
+        ],
+        hide_index=True,
+        use_container_width=True
+    )
+    
+    with st.expander("Recent steps"):
+        st.dataframe(
+            [
+                {
+                    'step': span['name'],
+                    'ms': round(span['seconds'] * 1000, 1),
+                    'in': span['parent'] or '',
+                    'error': span['error'] or ''
+                }
+                for span in telemetry.recent_spans(session)
+            ],
+            hide_index=True,
+            use_container_width=True
+        )
+    
+    if st.session_state.render_cpu:
+        st.caption("Render CPU: " + ", ".join(
+            f"{name} {seconds * 1000:.0f} ms" for name, seconds in st.session_state.render_cpu.items()
+        ))
+    
+    col1, col2, col3 = st.columns(3)
+    col1.button("Refresh", key="performance_refresh")
+    col2.download_button("JSONL", telemetry.export_jsonl(session), file_name="spans.jsonl", mime="application/x-ndjson")
+    col3.download_button("Metrics", telemetry.export_prometheus(), file_name="metrics.prom", mime="text/plain")
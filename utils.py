@@ -1,83 +1,460 @@
-import streamlit as st
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from langchain_openai import ChatOpenAI
 from langchain.schema import HumanMessage
 from tavily import TavilyClient
+import openai
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait
+import codecs
+import hashlib
+import json
+import logging
+import math
+import os
 import re
+import threading
+import time
+from collections import Counter
+from html.parser import HTMLParser
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+from urllib.robotparser import RobotFileParser
+from cache import CACHE_DIR, TieredCache, make_key
+from competitor_index import CompetitorIndex, name_key
+from deadline import DeadlineExceeded, check, current_deadline, remaining, time_left
+from dedupe import merge_competitors, registrable_domain
+from name_extraction import GENERIC_WORDS, NameExtractor
+from projects import ProjectStore
+from rate_limit import RateLimiter, submit_in_context
+from singleflight import SingleFlight
+from telemetry import Span, record_llm_usage, span, telemetry
 
-# Initialize API clients
-def initialize_apis():
-    """Initialize all API clients"""
-    llm = ChatOpenAI(
-        model="gpt-4o-mini",
-        api_key=st.secrets["OPENAI_API_KEY"],
-        temperature=0.7
-    )
-    tavily_client = TavilyClient(api_key=st.secrets.get("TAVILY_API_KEY", ""))
-    return llm, tavily_client
+logger = logging.getLogger(__name__)
 
 # =============================================================================
-# SESSION STATE MANAGEMENT
+# API CLIENTS
 # =============================================================================
 
-def initialize_session_state():
-    """Initialize all session state variables"""
-    if 'business_data' not in st.session_state:
-        st.session_state.business_data = {
-            'business_name': '',
-            'business_description': '',
-            'business_website': '',
-            'business_industry': ''
-        }
-    if 'recommendations' not in st.session_state:
-        st.session_state.recommendations = []
-    if 'applied_recommendations' not in st.session_state:
-        st.session_state.applied_recommendations = {
-            'tone_of_voice': '',
-            'tagline': '',
-            'logo_style': '',
-            'color_scheme': '',
-            'font': ''
+class PooledTavilyClient(TavilyClient):
+    """TavilyClient that sends its requests through one keep-alive session
+
+    The stock client calls requests.post for every search, which opens a new
+    connection (and TLS handshake) each time.
+    """
+
+    def __init__(self, api_key):
+        super().__init__(api_key)
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=16))
+
+    def _search(self, query, search_depth="basic", topic="general", days=2, max_results=5,
+                include_domains=None, exclude_domains=None,
+                include_answer=False, include_raw_content=False, include_images=False,
+                use_cache=True):
+        """Same request as TavilyClient._search, sent over the pooled session"""
+        data = {
+            "query": query,
+            "search_depth": search_depth,
+            "topic": topic,
+            "days": days,
+            "include_answer": include_answer,
+            "include_raw_content": include_raw_content,
+            "max_results": max_results,
+            "include_domains": include_domains or None,
+            "exclude_domains": exclude_domains or None,
+            "include_images": include_images,
+            "api_key": self.api_key,
+            "use_cache": use_cache,
         }
-    if 'logo_url' not in st.session_state:
-        st.session_state.logo_url = None
-    if 'competitors' not in st.session_state:
-        st.session_state.competitors = []
+        response = self.session.post(self.base_url, data=json.dumps(data), headers=self.headers,
+                                 timeout=time_left(100, 'search'))
+        response.raise_for_status()
+        return response.json()
+
+# Process-wide client registry, shared by every session and rerun
+_clients = {}
+_clients_lock = threading.Lock()
+
+def initialize_apis(openai_api_key=None, tavily_api_key=None):
+    """Return the shared API clients, building them on first use
+
+    Keys default to the OPENAI_API_KEY and TAVILY_API_KEY environment
+    variables. Clients are keyed on the API keys, so passing a rotated key
+    builds fresh clients without a restart.
+    """
+    if openai_api_key is None:
+        openai_api_key = os.environ["OPENAI_API_KEY"]
+    if tavily_api_key is None:
+        tavily_api_key = os.environ.get("TAVILY_API_KEY", "")
+    key = make_key(openai_api_key, tavily_api_key)
+    
+    clients = _clients.get(key)
+    if clients is not None:
+        return clients
+    
+    with _clients_lock:
+        # Another thread may have built them while we waited for the lock
+        if key in _clients:
+            return _clients[key]
+        
+        llm = ChatOpenAI(
+            model="gpt-4o-mini",
+            api_key=openai_api_key,
+            temperature=0.7,
+            # Retries go through openai_limiter so 429s feed its backoff
+            max_retries=0
+        )
+        tavily_client = PooledTavilyClient(api_key=tavily_api_key)
+        
+        # Calls already running on the old clients finish normally
+        _clients.clear()
+        _clients[key] = (llm, tavily_client)
+        return _clients[key]
 
 # =============================================================================
-# BUSINESS INFORMATION EXTRACTION
+# LLM RESPONSE CACHE
 # =============================================================================
 
-def scrape_website_content(url):
-    """Scrape website content"""
+# Shared by all sessions; repeat analyses of the same site hit this instead of the API
+llm_cache = TieredCache(os.path.join(CACHE_DIR, "llm_responses.sqlite3"))
+
+# Competitor searches repeat across businesses in the same industry. Results
+# are fresh for a day and served stale, while being refreshed, for a week more
+search_cache = TieredCache(
+    os.path.join(CACHE_DIR, "search_results.sqlite3"),
+    ttl=int(os.environ.get("SEARCH_CACHE_TTL", 24 * 3600)),
+    max_stale=int(os.environ.get("SEARCH_CACHE_MAX_STALE", 7 * 24 * 3600))
+)
+
+# Competitors found for every business, looked up by industry before searching
+competitor_index = CompetitorIndex(
+    os.path.join(CACHE_DIR, "competitors.sqlite3"),
+    max_age=int(os.environ.get("COMPETITOR_INDEX_MAX_AGE", 30 * 24 * 3600))
+)
+
+# Every analysed business, versioned, so earlier analyses reopen without API calls
+project_store = ProjectStore(
+    os.path.join(CACHE_DIR, "projects.sqlite3"),
+    max_versions=int(os.environ.get("PROJECT_MAX_VERSIONS", 20))
+)
+
+# Identical scrapes, prompts and searches running at the same time share one call
+scrape_flight = SingleFlight()
+llm_flight = SingleFlight()
+search_flight = SingleFlight()
+
+# Shared by all sessions so the process as a whole stays under the API limits
+openai_limiter = RateLimiter(
+    'openai',
+    requests_per_minute=int(os.environ.get("OPENAI_RPM", 500)),
+    tokens_per_minute=int(os.environ.get("OPENAI_TPM", 200000)),
+    max_concurrency=16,
+    retry_on=(openai.APIConnectionError,)
+)
+tavily_limiter = RateLimiter(
+    'tavily',
+    requests_per_minute=int(os.environ.get("TAVILY_RPM", 100)),
+    max_concurrency=8,
+    retry_on=(requests.ConnectionError, requests.Timeout)
+)
+
+# Completion tokens reserved per request on top of the prompt estimate
+COMPLETION_TOKEN_ESTIMATE = 500
+
+def rate_limit_stats():
+    """Queue depth, wait times and concurrency limits of the API limiters"""
+    return {'openai': openai_limiter.stats(), 'tavily': tavily_limiter.stats()}
+
+def cache_stats():
+    """Hit and miss counts of the LLM response and search result caches"""
+    return {'llm': llm_cache.stats(), 'search': search_cache.stats()}
+
+def coalescing_stats():
+    """Executed and collapsed call counts for the scrape, LLM and search paths"""
+    return {
+        'scrape': scrape_flight.stats(),
+        'llm': llm_flight.stats(),
+        'search': search_flight.stats()
+    }
+
+# Exported with the span metrics (--metrics, the panel's Metrics download), so
+# queue depth and wait times can be watched when sizing replicas
+telemetry.add_gauges('rate_limit', 'limiter', rate_limit_stats)
+telemetry.add_gauges('cache', 'cache', cache_stats)
+telemetry.add_gauges('coalescing', 'path', coalescing_stats)
+
+def llm_cache_key(llm, prompt):
+    """Cache key for a prompt sent to `llm`"""
+    return make_key(getattr(llm, 'model_name', None), getattr(llm, 'temperature', None), prompt)
+
+def llm_usage(response, prompt):
+    """(prompt_tokens, completion_tokens) the API reported, or estimates of them"""
+    usage = (getattr(response, 'response_metadata', None) or {}).get('token_usage') or {}
+    if usage.get('prompt_tokens') is not None:
+        return usage['prompt_tokens'], usage.get('completion_tokens') or 0
+    return estimate_tokens(prompt), estimate_tokens(response.content)
+
+def llm_timeout():
+    """Request timeout kwargs for an LLM call: what is left of the deadline, if any"""
+    if current_deadline.get() is None:
+        return {}
+    return {'timeout': time_left(None, 'llm')}
+
+def call_llm(llm, prompt, use_cache=True):
+    """Send a prompt to the LLM and return the response text
+
+    Responses are cached on (model, temperature, prompt). Pass use_cache=False
+    to force a fresh completion, e.g. for "regenerate" actions; the fresh
+    response replaces the cached one. Under a deadline the request times out
+    when the deadline passes.
+    """
+    key = llm_cache_key(llm, prompt)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return cached
+    check('llm')
+    
+    def complete():
+        message = HumanMessage(content=prompt)
+        tokens = estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE
+        with span('llm.call') as current:
+            response = openai_limiter.call(llm, [message], tokens=tokens, **llm_timeout())
+            record_llm_usage(current, getattr(llm, 'model_name', None), *llm_usage(response, prompt))
+        llm_cache.set(key, response.content)
+        return response.content
+    
+    return llm_flight.do((key, use_cache), complete)
+
+def stream_llm(llm, prompt, use_cache=True):
+    """Yield the LLM response text in chunks as the model produces them
+
+    Shares the response cache with call_llm: a cached response is yielded in
+    one chunk, and a completed stream is cached for later calls. If the
+    deadline passes mid-stream, DeadlineExceeded is raised after the chunks
+    received so far and the partial response is not cached.
+    """
+    key = llm_cache_key(llm, prompt)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+    
+    check('llm')
+    parts = []
+    tokens = estimate_tokens(prompt) + COMPLETION_TOKEN_ESTIMATE
+    # Not a with-span: the consumer may close this generator from another context
+    current = Span('llm.stream')
+    error = None
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=15)
+        with openai_limiter.slot(tokens=tokens):
+            for chunk in llm.stream([HumanMessage(content=prompt)], **llm_timeout()):
+                if not parts:
+                    current.set(first_token_seconds=current.elapsed())
+                parts.append(chunk.content)
+                yield chunk.content
+                check('llm')
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        # Streams report no usage, so both counts are estimates
+        record_llm_usage(current, getattr(llm, 'model_name', None), estimate_tokens(prompt), estimate_tokens(''.join(parts)))
+        current.finish(error)
+    llm_cache.set(key, ''.join(parts))
+
+# =============================================================================
+# BUSINESS INFORMATION EXTRACTION
+# =============================================================================
+
+# Upper bound on decoded bytes read from a single page
+SCRAPE_MAX_BYTES = 2 * 1024 * 1024
+
+# Visible text read from a single page before content selection
+SCRAPE_READ_CHARS = 32000
+
+# Approximate prompt tokens of page content kept per page
+SCRAPE_TOKEN_BUDGET = 1500
+
+HTML_CONTENT_TYPES = ("text/html", "application/xhtml+xml")
+
+# urllib3 decodes brotli responses only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+class VisibleTextParser(HTMLParser):
+    """Incremental HTML parser that collects visible text in blocks
+
+    Text inside script, style, nav, footer and header elements is skipped,
+    but links are collected from the whole document. Visible text is split
+    into blocks at block-level elements; each block records the element it
+    came from and how much of its text sits inside links. `done` turns true
+    once `max_chars` characters of visible text have been seen, so callers
+    can stop feeding the document early.
+    """
+
+    SKIPPED_TAGS = {"script", "style", "nav", "footer", "header"}
+    BLOCK_TAGS = {
+        "p", "div", "section", "article", "main", "aside", "li", "ul", "ol",
+        "h1", "h2", "h3", "h4", "h5", "h6", "td", "th", "tr", "table",
+        "blockquote", "pre", "dd", "dt", "br", "form", "title"
+    }
+
+    def __init__(self, max_chars=SCRAPE_READ_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+        self.blocks = []
+        self.visible_chars = 0
+        self.links = []
+        self._parts = []
+        self._block_tag = None
+        self._link_chars = 0
+        self._link_depth = 0
+        self._skip_depth = 0
+
+    @property
+    def done(self):
+        return self.visible_chars >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+            self._block_tag = tag
+        elif tag == 'a':
+            self._link_depth += 1
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self.BLOCK_TAGS:
+            self._flush()
+            self._block_tag = None
+        elif tag == 'a' and self._link_depth:
+            self._link_depth -= 1
+
+    def handle_data(self, data):
+        if self._skip_depth or self.done:
+            return
+        self._parts.append(data)
+        visible = len(' '.join(data.split()))
+        self.visible_chars += visible
+        if self._link_depth:
+            self._link_chars += visible
+
+    def close(self):
+        super().close()
+        self._flush()
+
+    def _flush(self):
+        """End the current block"""
+        text = ' '.join(''.join(self._parts).split())
+        if text:
+            self.blocks.append({
+                'text': text,
+                'tag': self._block_tag,
+                'link_chars': min(self._link_chars, len(text))
+            })
+        self._parts = []
+        self._link_chars = 0
+
+    def text(self):
+        """Return all collected text, one block per line"""
+        self._flush()
+        return '\n'.join(block['text'] for block in self.blocks)
+
+def detect_charset(content_type, head):
+    """Pick the charset from the Content-Type header or a <meta> tag, else utf-8"""
+    match = re.search(r'charset=["\']?([\w-]+)', content_type, re.IGNORECASE)
+    if not match:
+        match = re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', head[:2048], re.IGNORECASE)
+    if match:
+        charset = match.group(1)
+        if isinstance(charset, bytes):
+            charset = charset.decode('ascii')
+        try:
+            codecs.lookup(charset)
+            return charset
+        except LookupError:
+            pass
+    return 'utf-8'
+
+def fetch_page(url, token_budget=SCRAPE_TOKEN_BUDGET, max_bytes=SCRAPE_MAX_BYTES):
+    """Fetch a page and return (final_url, selected_text, links)
+
+    Concurrent fetches of the same canonical URL share one request; see
+    _fetch_page for the details.
+    """
+    key = (canonicalize_url(url), token_budget, max_bytes)
+    return scrape_flight.do(key, _fetch_page, url, token_budget, max_bytes)
+
+def _fetch_page(url, token_budget, max_bytes):
+    """Fetch a page without request coalescing
+
+    The page is streamed and parsed incrementally: non-HTML responses are
+    rejected before the body is read, and reading stops after `max_bytes`
+    bytes or once SCRAPE_READ_CHARS characters of visible text have been
+    collected. The most relevant blocks are then kept, up to `token_budget`
+    approximate tokens. Under a deadline, reading also stops when it passes
+    and the text read so far is used. Errors are raised to the caller.
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml;q=0.9,*/*;q=0.1',
+        'Accept-Encoding': ACCEPT_ENCODING
+    }
+    deadline = current_deadline.get()
+    with span('http.page', host=urlsplit(url).hostname) as current, \
+            requests.get(url, headers=headers, timeout=time_left(15, 'scrape'), stream=True) as response:
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.content, 'html.parser')
+        content_type = response.headers.get('Content-Type', '')
+        mime_type = content_type.split(';')[0].strip().lower()
+        if mime_type and mime_type not in HTML_CONTENT_TYPES:
+            raise ValueError(f"unsupported content type '{mime_type}'")
         
-        # Remove script and style elements
-        for script in soup(["script", "style", "nav", "footer", "header"]):
-            script.decompose()
+        parser = VisibleTextParser(SCRAPE_READ_CHARS)
+        decoder = None
+        bytes_read = 0
         
-        # Extract text content
-        text = soup.get_text()
-        lines = (line.strip() for line in text.splitlines())
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        clean_text = ' '.join(chunk for chunk in chunks if chunk)
+        # iter_content yields decompressed bytes, so the ceiling also bounds memory
+        for chunk in response.iter_content(chunk_size=16384):
+            if decoder is None:
+                charset = detect_charset(content_type, chunk)
+                decoder = codecs.getincrementaldecoder(charset)(errors='replace')
+            bytes_read += len(chunk)
+            parser.feed(decoder.decode(chunk))
+            if parser.done or bytes_read >= max_bytes:
+                break
+            if deadline is not None and deadline.expired:
+                logger.warning("Stopped reading %s at the deadline after %d bytes", url, bytes_read)
+                break
         
-        # Limit content
-        content = clean_text[:8000]
+        parser.close()
+        current.set(bytes=bytes_read)
+        
+        links = [urljoin(response.url, link) for link in parser.links]
+        with span('parse.content'):
+            content = select_content(parser.blocks, token_budget)
+        return response.url, content, links
+
+def scrape_website_content(url, token_budget=SCRAPE_TOKEN_BUDGET, max_bytes=SCRAPE_MAX_BYTES):
+    """Scrape website content"""
+    try:
+        final_url, content, links = fetch_page(url, token_budget, max_bytes)
         return content
     except Exception as e:
-        st.error(f"Error scraping website: {str(e)}")
+        logger.error("Error scraping website %s: %s", url, e)
         return None
 
-def extract_business_info_from_website(website_content, url, llm):
+def extract_business_info_from_website(website_content, url, llm, use_cache=True):
     """Extract business information from website using LangChain"""
     prompt = f"""
     Analyze the following website content and extract key business information.
@@ -97,9 +474,7 @@ def extract_business_info_from_website(website_content, url, llm):
     """
     
     try:
-        message = HumanMessage(content=prompt)
-        response = llm([message])
-        extracted_info = response.content
+        extracted_info = call_llm(llm, prompt, use_cache=use_cache)
         
         # Parse the response
         business_info = {
@@ -109,33 +484,305 @@ def extract_business_info_from_website(website_content, url, llm):
             'business_industry': ''
         }
         
-        lines = extracted_info.split('\n')
-        for line in lines:
-            if ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip().lower()
-                value = value.strip()
-                
-                if 'business name' in key:
-                    business_info['business_name'] = value
-                elif 'business description' in key:
-                    business_info['business_description'] = value
-                elif 'business industry' in key:
-                    business_info['business_industry'] = value
+        with span('parse.business_info'):
+            lines = extracted_info.split('\n')
+            for line in lines:
+                if ':' in line:
+                    key, value = line.split(':', 1)
+                    key = key.strip().lower()
+                    value = value.strip()
+                    
+                    if 'business name' in key:
+                        business_info['business_name'] = value
+                    elif 'business description' in key:
+                        business_info['business_description'] = value
+                    elif 'business industry' in key:
+                        business_info['business_industry'] = value
         
         return business_info
         
     except Exception as e:
-        st.error(f"Error extracting business information: {str(e)}")
+        logger.error("Error extracting business information: %s", e)
         return None
 
+# =============================================================================
+# CONTENT SELECTION
+# =============================================================================
+
+# Words that mark a block as describing what the business does
+BUSINESS_TERMS = {
+    'we', 'our', 'us', 'company', 'business', 'service', 'services', 'product',
+    'products', 'solution', 'solutions', 'customers', 'clients', 'founded',
+    'mission', 'help', 'helps', 'provide', 'provides', 'offer', 'offers',
+    'specialize', 'specializes', 'industry', 'platform', 'about', 'team',
+    'design', 'designs', 'produce', 'producing', 'serving', 'since'
+}
+
+# Words typical of cookie banners, sign-up boxes and legal boilerplate
+BOILERPLATE_TERMS = {
+    'cookie', 'cookies', 'consent', 'privacy', 'policy', 'subscribe',
+    'newsletter', 'copyright', 'reserved', 'login', 'log', 'sign', 'accept',
+    'terms', 'javascript', 'browser', 'cart', 'checkout'
+}
+
+# Blocks that usually carry the business name
+TITLE_TAGS = {'title', 'h1'}
+
+# Blocks scoring below this are left out even if they fit: link lists, bare
+# labels and boilerplate. An absolute floor, so a high-scoring title or
+# heading doesn't push ordinary content out
+MIN_BLOCK_SCORE = 0.02
+
+def estimate_tokens(text):
+    """Rough prompt token count, about four characters per token"""
+    return len(text) // 4 + 1
+
+def score_blocks(blocks):
+    """Score page blocks by how likely they are to describe the business
+
+    Combines a TF-IDF weight of business-intent terms (IDF taken across the
+    page's blocks, so words repeated in every block count for little) with
+    penalties for boilerplate words, link-heavy blocks and very short blocks,
+    and a mild preference for blocks near the top of the page. Words from the
+    page title and main heading (usually the business name) count as intent
+    terms too, and those blocks get a fixed bonus.
+    """
+    tokenized = [re.findall(r"[a-z]+", block['text'].lower()) for block in blocks]
+    total = len(blocks)
+    document_frequency = Counter()
+    for words in tokenized:
+        document_frequency.update(set(words))
+    
+    intent_terms = set(BUSINESS_TERMS)
+    for block, words in zip(blocks, tokenized):
+        if block.get('tag') in TITLE_TAGS:
+            intent_terms.update(word for word in words if len(word) > 2)
+    
+    scores = []
+    for position, (block, words) in enumerate(zip(blocks, tokenized)):
+        if not words:
+            scores.append(0.0)
+            continue
+        counts = Counter(words)
+        relevance = sum(
+            counts[term] * (math.log((total + 1) / (document_frequency[term] + 1)) + 1)
+            for term in intent_terms if term in counts
+        ) / len(words)
+        boilerplate = sum(counts[term] for term in BOILERPLATE_TERMS if term in counts) / len(words)
+        link_density = block['link_chars'] / len(block['text'])
+        length_factor = min(len(words) / 12, 1.0)
+        position_factor = 1 - 0.5 * position / total
+        title_bonus = 0.5 if block.get('tag') in TITLE_TAGS else 0.0
+        
+        score = (0.05 + relevance - 3 * boilerplate) * (1 - link_density) * length_factor * position_factor
+        score += title_bonus
+        scores.append(score)
+    return scores
+
+def select_content(blocks, token_budget=SCRAPE_TOKEN_BUDGET):
+    """Fill `token_budget` with the highest scoring blocks, kept in page order
+
+    Blocks are taken greedily by score down to MIN_BLOCK_SCORE; one that
+    doesn't fit is skipped and smaller ones after it can still fill the
+    budget.
+    """
+    if not blocks:
+        return ''
+    scores = score_blocks(blocks)
+    ranked = sorted(range(len(blocks)), key=lambda i: scores[i], reverse=True)
+    
+    chosen = set()
+    seen_texts = set()
+    used = 0
+    for i in ranked:
+        text = blocks[i]['text']
+        if scores[i] < MIN_BLOCK_SCORE:
+            break
+        # Repeated template blocks ("Customer 1", "Customer 2", ...) count once
+        template = re.sub(r'\d+', '#', text)
+        if template in seen_texts:
+            continue
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            continue
+        chosen.add(i)
+        seen_texts.add(template)
+        used += cost
+    
+    return '\n'.join(blocks[i]['text'] for i in sorted(chosen))
+
+# =============================================================================
+# SITE CRAWLING
+# =============================================================================
+
+# Paths worth following when looking for what a business does
+CRAWL_KEYWORDS = {
+    'about': 3, 'what-we-do': 3, 'services': 3, 'products': 3, 'solutions': 3,
+    'pricing': 2, 'company': 2, 'features': 2, 'who-we-are': 2, 'mission': 1, 'team': 1
+}
+
+# Approximate prompt tokens of page content across all crawled pages
+CRAWL_TOKEN_BUDGET = 4000
+
+class HostLimiter:
+    """Caps the number of concurrent requests to each host"""
+
+    def __init__(self, per_host=3):
+        self.per_host = per_host
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def slot(self, url):
+        """Return the semaphore guarding requests to the host of `url`"""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+def canonicalize_url(url):
+    """Normalise a URL so equivalent spellings compare equal"""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/') or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+def same_site(url, other):
+    """True when both URLs are on the same host, ignoring a www. prefix"""
+    def host(u):
+        name = (urlsplit(u).hostname or '').lower()
+        return name[4:] if name.startswith('www.') else name
+    return host(url) == host(other)
+
+def score_link(url):
+    """Score how likely a link is to describe the business, 0 if not at all"""
+    path = urlsplit(url).path.lower()
+    return sum(weight for keyword, weight in CRAWL_KEYWORDS.items() if keyword in path)
+
+def load_robots(url):
+    """Fetch and parse robots.txt for the site of `url`
+
+    A missing or unreadable robots.txt allows everything.
+    """
+    parts = urlsplit(url)
+    robots_url = urlunsplit((parts.scheme, parts.netloc, '/robots.txt', '', ''))
+    robots = RobotFileParser(robots_url)
+    try:
+        with span('http.robots', host=parts.hostname) as current:
+            response = requests.get(robots_url, timeout=time_left(5, 'robots.txt'))
+            current.set(bytes=len(response.content))
+        if response.status_code >= 400:
+            robots.allow_all = True
+        else:
+            robots.parse(response.text.splitlines())
+    except (requests.RequestException, DeadlineExceeded):
+        robots.allow_all = True
+    return robots
+
+def crawl_website(url, max_pages=5, per_host=3, time_budget=20, token_budget=CRAWL_TOKEN_BUDGET):
+    """Crawl the pages of a site most likely to describe the business
+
+    Fetches `url`, then follows same-site links whose paths look like about,
+    services, products or pricing pages. Followed links are checked against
+    robots.txt and fetched concurrently, at most `per_host` at a time, until
+    `max_pages` pages are collected or `time_budget` seconds, or what is left
+    of the current deadline, have passed.
+    Pages are deduplicated by canonical URL and by content, and pages that
+    redirect off the site's registrable domain are dropped. The homepage
+    gets half of `token_budget` and the other pages share the rest.
+
+    Returns a list of {'url', 'text'} dicts, starting with `url` itself, or
+    an empty list if `url` could not be scraped.
+    """
+    deadline = time.monotonic() + min(time_budget, remaining(time_budget))
+    home_budget = token_budget // 2 if max_pages > 1 else token_budget
+    page_budget = (token_budget - home_budget) // max(max_pages - 1, 1)
+    
+    try:
+        final_url, text, links = fetch_page(url, home_budget)
+    except Exception as e:
+        logger.error("Error scraping website %s: %s", url, e)
+        return []
+    
+    pages = [{'url': final_url, 'text': text}]
+    seen_urls = {canonicalize_url(url), canonicalize_url(final_url)}
+    seen_hashes = {hashlib.sha1(text.encode('utf-8')).hexdigest()}
+    
+    # Rank candidate links, best first, shorter paths breaking ties
+    candidates = {}
+    for link in links:
+        canonical = canonicalize_url(link)
+        if canonical in seen_urls or not canonical.startswith(('http://', 'https://')):
+            continue
+        if not same_site(canonical, final_url):
+            continue
+        score = score_link(canonical)
+        if score:
+            candidates[canonical] = score
+    ranked = sorted(candidates, key=lambda link: (-candidates[link], len(link)))
+    
+    if not ranked or max_pages <= 1:
+        return pages
+    
+    robots = load_robots(final_url)
+    ranked = [link for link in ranked if robots.can_fetch('*', link)]
+    # Spare links stand in for pages that fail or turn out to be duplicates
+    ranked = ranked[:(max_pages - 1) * 2]
+    
+    limiter = HostLimiter(per_host)
+    
+    def fetch(link):
+        with limiter.slot(link):
+            if time.monotonic() >= deadline:
+                return None
+            return fetch_page(link, page_budget)
+    
+    executor = ThreadPoolExecutor(max_workers=per_host)
+    futures = [submit_in_context(executor, fetch, link) for link in ranked]
+    
+    for link, future in zip(ranked, futures):
+        if len(pages) >= max_pages:
+            break
+        try:
+            result = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FuturesTimeoutError:
+            break
+        except Exception:
+            continue
+        if not result:
+            continue
+        
+        page_url, page_text, page_links = result
+        if registrable_domain(page_url) != registrable_domain(final_url):
+            # Redirected off the site, e.g. to a social profile or a parked domain
+            logger.info("Skipping %s: redirected to %s", link, page_url)
+            continue
+        canonical = canonicalize_url(page_url)
+        content_hash = hashlib.sha1(page_text.encode('utf-8')).hexdigest()
+        if not page_text or canonical in seen_urls or content_hash in seen_hashes:
+            continue
+        seen_urls.add(canonical)
+        seen_hashes.add(content_hash)
+        pages.append({'url': page_url, 'text': page_text})
+    
+    executor.shutdown(wait=False, cancel_futures=True)
+    return pages
+
+def merge_page_texts(pages):
+    """Merge crawled pages into one text for the extraction prompt"""
+    return '\n\n'.join(f"[Page: {page['url']}]\n{page['text']}" for page in pages)
+
 # =============================================================================
 # RECOMMENDATIONS GENERATION
 # =============================================================================
 
-def generate_recommendations(business_data, llm):
-    """Generate branding recommendations based on business information"""
-    prompt = f"""
+def build_recommendations_prompt(business_data):
+    """Build the prompt asking for the five branding recommendations"""
+    return f"""
     Based on the following business information, generate 5 specific branding recommendations:
     
     Business Name: {business_data.get('business_name', 'N/A')}
@@ -153,52 +800,157 @@ def generate_recommendations(business_data, llm):
     
     Each recommendation should be specific, actionable, and tailored to this business.
     """
+
+def parse_recommendation_line(line):
+    """Parse one `N. Type|recommendation|explanation` line, or return None"""
+    if '|' in line and any(char.isdigit() for char in line[:3]):
+        parts = line.split('|')
+        if len(parts) >= 3:
+            # Remove number prefix
+            recommendation_type = parts[0].split('.', 1)[-1].strip()
+            recommendation = parts[1].strip()
+            description = parts[2].strip()
+            
+            return {
+                'type': recommendation_type,
+                'recommendation': recommendation,
+                'description': description
+            }
+    return None
+
+def generate_recommendations(business_data, llm, use_cache=True):
+    """Generate branding recommendations based on business information"""
+    prompt = build_recommendations_prompt(business_data)
     
     try:
-        message = HumanMessage(content=prompt)
-        response = llm([message])
-        recommendations_text = response.content
+        recommendations_text = call_llm(llm, prompt, use_cache=use_cache)
         
         # Parse recommendations
         recommendations = []
-        lines = recommendations_text.split('\n')
-        
-        for line in lines:
-            if '|' in line and any(char.isdigit() for char in line[:3]):
-                parts = line.split('|')
-                if len(parts) >= 3:
-                    # Remove number prefix
-                    recommendation_type = parts[0].split('.', 1)[-1].strip()
-                    recommendation = parts[1].strip()
-                    description = parts[2].strip()
-                    
-                    recommendations.append({
-                        'type': recommendation_type,
-                        'recommendation': recommendation,
-                        'description': description
-                    })
+        with span('parse.recommendations'):
+            lines = recommendations_text.split('\n')
+            
+            for line in lines:
+                recommendation = parse_recommendation_line(line)
+                if recommendation:
+                    recommendations.append(recommendation)
         
         return recommendations
         
     except Exception as e:
-        st.error(f"Error generating recommendations: {str(e)}")
+        logger.error("Error generating recommendations: %s", e)
         return []
 
-def apply_recommendation(rec_type, recommendation):
-    """Apply a recommendation to the business data"""
-    type_mapping = {
-        'Tone of Voice': 'tone_of_voice',
-        'Tagline': 'tagline',
-        'Logo Style': 'logo_style',
-        'Color Scheme': 'color_scheme',
-        'Font': 'font'
-    }
+def stream_recommendations(business_data, llm, use_cache=True):
+    """Yield branding recommendations one at a time as the model writes them
+
+    Each line is parsed as soon as it ends, with the same parser as
+    generate_recommendations, so the yielded rows match its result.
+    """
+    prompt = build_recommendations_prompt(business_data)
     
-    if rec_type in type_mapping:
-        st.session_state.applied_recommendations[type_mapping[rec_type]] = recommendation
-        st.success(f"Applied {rec_type}: {recommendation}")
-    else:
-        st.error("Unknown recommendation type")
+    try:
+        buffer = ''
+        for chunk in stream_llm(llm, prompt, use_cache=use_cache):
+            buffer += chunk
+            while '\n' in buffer:
+                line, buffer = buffer.split('\n', 1)
+                recommendation = parse_recommendation_line(line)
+                if recommendation:
+                    yield recommendation
+        
+        recommendation = parse_recommendation_line(buffer)
+        if recommendation:
+            yield recommendation
+        
+    except Exception as e:
+        logger.error("Error generating recommendations: %s", e)
+
+# Per-category prompt hints, in the order the recommendations are shown
+RECOMMENDATION_CATEGORIES = {
+    'Tone of Voice': ('[specific tone recommendation]', '[brief explanation why this tone fits]'),
+    'Tagline': ('[catchy tagline]', '[explanation of tagline strategy]'),
+    'Logo Style': ('[logo style recommendation]', '[why this style works for the business]'),
+    'Color Scheme': ('[specific colors with hex codes]', '[psychology behind color choices]'),
+    'Font': ('[specific font recommendation]', '[why this font fits the brand]')
+}
+
+def build_category_prompt(business_data, category):
+    """Build a prompt asking for the recommendation of a single category"""
+    recommendation_hint, explanation_hint = RECOMMENDATION_CATEGORIES[category]
+    return f"""
+    Based on the following business information, generate one specific {category} recommendation:
+    
+    Business Name: {business_data.get('business_name', 'N/A')}
+    Business Description: {business_data.get('business_description', 'N/A')}
+    Business Industry: {business_data.get('business_industry', 'N/A')}
+    Business Website: {business_data.get('business_website', 'N/A')}
+    
+    Reply with exactly one line in this format:
+    
+    1. {category}|{recommendation_hint}|{explanation_hint}
+    
+    The recommendation should be specific, actionable, and tailored to this business.
+    """
+
+def generate_category_recommendation(business_data, category, llm, use_cache=True):
+    """Generate the recommendation for one category, or None if it can't be parsed"""
+    response = call_llm(llm, build_category_prompt(business_data, category), use_cache=use_cache)
+    for line in response.split('\n'):
+        recommendation = parse_recommendation_line(line)
+        if recommendation:
+            # The type is known; don't depend on the model echoing it exactly
+            recommendation['type'] = category
+            return recommendation
+    return None
+
+def generate_recommendations_parallel(business_data, llm, categories=None, deadline=30, retries=1, use_cache=True):
+    """Generate recommendations with one concurrent request per category
+
+    All requests share one `deadline` in seconds, cut to what is left of the
+    current request's deadline. Categories whose response
+    fails or can't be parsed are retried up to `retries` times with a fresh
+    completion while time remains. Pass a subset of `categories` to
+    regenerate only those. Returns the recommendations that succeeded, in
+    category order.
+    """
+    categories = list(categories or RECOMMENDATION_CATEGORIES)
+    results = {}
+    end = time.monotonic() + min(deadline, remaining(deadline))
+    executor = ThreadPoolExecutor(max_workers=len(categories))
+    
+    def submit(category, attempt):
+        # A cached response that failed to parse would fail again, so retries skip the cache
+        future = submit_in_context(
+            executor, generate_category_recommendation, business_data, category, llm,
+            use_cache=use_cache and attempt == 0
+        )
+        return future, (category, attempt)
+    
+    running = dict(submit(category, 0) for category in categories)
+    while running:
+        done, _ = wait(running, timeout=max(end - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+        if not done:
+            logger.warning("Recommendations for %s missed the deadline", ', '.join(c for c, _ in running.values()))
+            break
+        
+        for future in done:
+            category, attempt = running.pop(future)
+            try:
+                recommendation = future.result()
+            except Exception as e:
+                logger.warning("Error generating %s recommendation: %s", category, e)
+                recommendation = None
+            
+            if recommendation:
+                results[category] = recommendation
+            elif attempt < retries and time.monotonic() < end:
+                # Retry only this category; the others keep running
+                new_future, info = submit(category, attempt + 1)
+                running[new_future] = info
+    
+    executor.shutdown(wait=False, cancel_futures=True)
+    return [results[category] for category in categories if category in results]
 
 # =============================================================================
 # LOGO GENERATION
@@ -237,28 +989,50 @@ def generate_logo_with_dalle(business_data, applied_recommendations, llm):
         # Note: This would typically use DALL-E API, but for demonstration
         # In a real implementation, you'd use:
         # from openai import OpenAI
-        # client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+        # client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
         # response = client.images.generate(model="dall-e-3", prompt=prompt, size="1024x1024")
         # return response.data[0].url
         
         # For demonstration, return a placeholder
-        st.info("Logo generation would use DALL-E API here")
+        logger.info("Logo generation would use DALL-E API here")
         return "https://via.placeholder.com/400x300/4CAF50/FFFFFF?text=Claude+Uplift+Logo"
         
     except Exception as e:
-        st.error(f"Error generating logo: {str(e)}")
+        logger.error("Error generating logo: %s", e)
         return None
 
 # =============================================================================
 # COMPETITOR ANALYSIS
 # =============================================================================
 
-def search_competitors(business_data, tavily_client):
-    """Search for competitors using business information"""
+def search_competitors(business_data, tavily_client, query_timeout=8, deadline=12, limit=10,
+                       results_per_query=3, use_cache=True):
+    """Search for competitors using business information
+
+    Competitors already indexed for the industry are answered from the
+    competitor index; the live search only runs when it holds fewer than
+    `limit` of them, its finds are added to the index, and the index tops
+    the result up. With `use_cache` false the index is not consulted and
+    the searches skip the search result cache, so everything is fresh.
+
+    The search queries run concurrently. Each query gets at most `query_timeout`
+    seconds from when it starts and the whole fan-out at most `deadline`
+    seconds, or what is left of the current request's deadline; queries still
+    running after that are abandoned and the results already in are used.
+    At most `limit` competitors are returned, from `results_per_query` search
+    results per query.
+    """
     try:
         business_name = business_data.get('business_name', '')
         industry = business_data.get('business_industry', '')
         
+        indexed = []
+        if use_cache:
+            with span('index.lookup'):
+                indexed = competitor_index.lookup(industry, limit=limit, exclude=business_name)
+            if len(indexed) >= limit:
+                return indexed
+        
         # Search queries
         queries = [
             f"companies in {industry} industry",
@@ -266,110 +1040,308 @@ def search_competitors(business_data, tavily_client):
             f"{industry} businesses similar to {business_name}"
         ]
         
-        competitors = []
+        # (query, result) pairs from every query, in query order
+        results = []
+        
+        # When each query's worker started, as its query_timeout runs from there
+        query_starts = {}
         
-        for query in queries:
+        def search(query):
+            query_starts[query] = time.monotonic()
+            return cached_search(tavily_client, query, max_results=results_per_query, use_cache=use_cache)
+        
+        executor = ThreadPoolExecutor(max_workers=len(queries))
+        start = time.monotonic()
+        deadline = min(deadline, remaining(deadline))
+        futures = [(query, submit_in_context(executor, search, query)) for query in queries]
+        
+        # Collect in query order so the extraction below stays deterministic
+        for query, future in futures:
+            now = time.monotonic()
+            left = min(start + deadline, query_starts.get(query, now) + query_timeout) - now
             try:
-                results = tavily_client.search(query, max_results=3)
-                
-                for result in results.get('results', []):
-                    title = result.get('title', '')
-                    url = result.get('url', '')
-                    content = result.get('content', '')
-                    
-                    # Extract potential business names from title and content
-                    potential_names = extract_business_names(title, content)
-                    
-                    for name in potential_names:
-                        if name.lower() != business_name.lower():  # Don't include self
-                            competitors.append({
-                                'name': name,
-                                'website': url,
-                                'industry': industry,
-                                'description': content[:200] + '...' if len(content) > 200 else content
-                            })
+                response = future.result(timeout=max(left, 0))
+                results.extend((query, result) for result in response.get('results', []))
+            except FuturesTimeoutError:
+                logger.warning("Search query '%s' timed out", query)
+                continue
             except Exception as e:
-                st.warning(f"Error in search query '{query}': {str(e)}")
+                logger.warning("Error in search query '%s': %s", query, e)
                 continue
         
-        # Remove duplicates
-        unique_competitors = []
-        seen_names = set()
+        # Don't wait for slow queries, their results are discarded anyway
+        executor.shutdown(wait=False, cancel_futures=True)
         
-        for comp in competitors:
-            if comp['name'].lower() not in seen_names:
-                seen_names.add(comp['name'].lower())
-                unique_competitors.append(comp)
+        # Extract business names from all results in one pass, best candidates first
+        with span('parse.names'):
+            candidates = name_extractor.extract([result for _, result in results], exclude=business_name)
+        
+        competitors = []
+        source_queries = {}
+        for candidate in candidates:
+            query, result = results[candidate['result']]
+            content = result.get('content', '')
+            competitors.append({
+                'name': candidate['name'],
+                'website': result.get('url', ''),
+                'industry': industry,
+                'description': content[:200] + '...' if len(content) > 200 else content
+            })
+            source_queries[candidate['name']] = query
         
-        return unique_competitors[:10]  # Limit to top 10
+        # "Acme", "Acme Inc" and "Acme Cloud" on acme.com are one competitor
+        with span('parse.merge'):
+            competitors = merge_competitors(competitors)
+        
+        found_by_query = {query: [] for query in queries}
+        for competitor in competitors:
+            found_by_query[source_queries[competitor['name']]].append(competitor)
+        for query, found in found_by_query.items():
+            if found:
+                competitor_index.add(industry, found, source_query=query)
+        
+        # Top up with what the index already knew, skipping ones found again
+        found_keys = {name_key(name) for competitor in competitors for name in [competitor['name'], *competitor['aliases']]}
+        competitors += [competitor for competitor in indexed if name_key(competitor['name']) not in found_keys]
+        
+        return competitors[:limit]
         
     except Exception as e:
-        st.error(f"Error searching competitors: {str(e)}")
+        logger.error("Error searching competitors: %s", e)
         return []
 
+# Stateless once built, so one instance serves every thread
+name_extractor = NameExtractor()
+
+def normalize_query(query):
+    """Lowercase a search query and collapse its whitespace"""
+    return ' '.join(query.lower().split())
+
+# Background refreshes of stale search results, and the keys being refreshed
+_revalidate_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='revalidate')
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+def cached_search(tavily_client, query, max_results=3, use_cache=True):
+    """Tavily search through the shared search result cache
+
+    Results are keyed on the normalised query and `max_results`. A fresh
+    entry is returned as is; a stale one is returned too, and refreshed in
+    the background for the next caller. Only a miss waits for Tavily. With
+    `use_cache` false the search always runs, and replaces the cached entry.
+    """
+    key = make_key('tavily', normalize_query(query), max_results)
+    if not use_cache:
+        return search_flight.do(key, _fetch_search, key, tavily_client, query, max_results)
+    results, fresh = search_cache.lookup(key)
+    if results is None:
+        return search_flight.do(key, _fetch_search, key, tavily_client, query, max_results)
+
+    if not fresh:
+        with _revalidating_lock:
+            refresh = key not in _revalidating
+            _revalidating.add(key)
+        if refresh:
+            submit_in_context(_revalidate_executor, _revalidate_search, key, tavily_client, query, max_results)
+    return results
+
+def _fetch_search(key, tavily_client, query, max_results):
+    """Run a Tavily search and store its results in the cache"""
+    with span('search.tavily') as current:
+        results = tavily_limiter.call(tavily_client.search, query, max_results=max_results)
+        current.set(results=len(results.get('results', [])))
+    search_cache.set(key, results)
+    return results
+
+def _revalidate_search(key, tavily_client, query, max_results):
+    """Replace a stale cache entry, keeping it if the search fails"""
+    try:
+        search_flight.do(key, _fetch_search, key, tavily_client, query, max_results)
+    except Exception as e:
+        logger.warning("Refreshing search '%s' failed: %s", query, e)
+    finally:
+        with _revalidating_lock:
+            _revalidating.discard(key)
+
 def extract_business_names(title, content):
     """Extract potential business names from title and content"""
-    names = []
-    
-    # Extract from title
-    if title:
-        # Remove common words and patterns
-        title_clean = re.sub(r'\b(Inc|LLC|Corp|Company|Ltd|Limited)\b', '', title, flags=re.IGNORECASE)
-        title_clean = re.sub(r'[^\w\s]', ' ', title_clean)
-        
-        # Split and take meaningful parts
-        words = title_clean.split()
-        if len(words) >= 1:
-            # Take first 1-3 words as potential company name
-            for i in range(1, min(4, len(words) + 1)):
-                potential_name = ' '.join(words[:i]).strip()
-                if len(potential_name) > 2 and potential_name.lower() not in ['the', 'and', 'or']:
-                    names.append(potential_name)
-    
-    # Extract from content using patterns
-    if content:
-        # Look for patterns like "CompanyName is" or "CompanyName provides"
-        patterns = [
-            r'([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,2})\s+(?:is|provides|offers|specializes)',
-            r'([A-Z][a-zA-Z]*(?:\s+[A-Z][a-zA-Z]*){0,2})\s+(?:Inc|LLC|Corp|Company|Ltd)',
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, content)
-            for match in matches:
-                if len(match) > 2:
-                    names.append(match.strip())
-    
-    return list(set(names))  # Remove duplicates
+    return [candidate['name'] for candidate in name_extractor.extract([{'title': title, 'content': content}])]
 
 # =============================================================================
-# UI HELPER FUNCTIONS
+# COMPETITOR ENRICHMENT
 # =============================================================================
 
-def display_business_summary():
-    """Display current business information"""
-    if any(st.session_state.business_data.values()):
-        st.subheader("📄 Current Business Information")
-        
-        data = st.session_state.business_data
-        if data['business_name']:
-            st.write(f"**Business Name:** {data['business_name']}")
-        if data['business_description']:
-            st.write(f"**Description:** {data['business_description']}")
-        if data['business_website']:
-            st.write(f"**Website:** {data['business_website']}")
-        if data['business_industry']:
-            st.write(f"**Industry:** {data['business_industry']}")
-
-def display_applied_recommendations():
-    """Display currently applied recommendations"""
-    applied = st.session_state.applied_recommendations
-    if any(applied.values()):
-        st.subheader("✅ Applied Recommendations")
-        for key, value in applied.items():
-            if value:
-                display_key = key.replace('_', ' ').title()
-                st.write(f"**{display_key}:** {value}")
+# Prompt budget per competitor homepage, and homepages profiled per LLM call
+ENRICH_TOKEN_BUDGET = 600
+ENRICH_BATCH_SIZE = 4
+
+PROFILE_LINE = re.compile(
+    r'^\s*(\d+)[.)]\s*Business Name:\s*(.*?)\s*\|\s*Business Description:\s*(.*?)'
+    r'\s*\|\s*Business Industry:\s*(.*?)\s*$',
+    re.IGNORECASE | re.MULTILINE
+)
+
+def homepage_matches(name, url):
+    """True if `url` is on a domain that looks like the business's own"""
+    label = registrable_domain(url).split('.')[0]
+    words = [word for word in name_key(name).split() if word not in GENERIC_WORDS]
+    if not label or not words:
+        return False
+    return ''.join(words) in label or (len(words[0]) >= 4 and words[0] in label)
+
+def resolve_homepage(competitor, tavily_client=None):
+    """Root URL of a competitor's own website, or None if it can't be found
+
+    The search result a competitor came from is often an article or a
+    directory listing, so when it isn't on the competitor's own domain this
+    searches for the competitor's site.
+    """
+    name = competitor['name']
+    urls = [competitor.get('website') or '']
+    if not homepage_matches(name, urls[0]) and tavily_client is not None:
+        response = cached_search(tavily_client, f"{name} official website", max_results=3)
+        urls = [result.get('url', '') for result in response.get('results', [])]
+    
+    for url in urls:
+        if homepage_matches(name, url):
+            parts = urlsplit(url)
+            return f"{parts.scheme}://{parts.netloc}/"
+    return None
+
+def fetch_competitor_homepage(competitor, tavily_client, limiter):
+    """Resolve and scrape a competitor's homepage; returns (homepage, content)"""
+    homepage = resolve_homepage(competitor, tavily_client)
+    if homepage is None:
+        return None, None
+    with limiter.slot(homepage):
+        return homepage, scrape_website_content(homepage, token_budget=ENRICH_TOKEN_BUDGET)
+
+def build_competitor_profiles_prompt(pages):
+    """Prompt extracting business information from several websites at once"""
+    websites = '\n\n'.join(
+        f"Website {number}: {url}\n{content}" for number, (url, content) in enumerate(pages, 1)
+    )
+    return f"""
+    Analyze the following websites and extract key business information for each of them.
+    
+    {websites}
+    
+    Please provide ONLY one line per website, numbered like the websites, in this exact format:
+    
+    1. Business Name: [extracted name] | Business Description: [brief description of what they do] | Business Industry: [industry/sector]
+    
+    If any information is not clearly available, write "Not specified" for that field.
+    Keep descriptions concise and factual.
+    """
+
+def extract_competitor_profiles(pages, llm, use_cache=True):
+    """Extract business information for a batch of (url, content) pages with one LLM call
+
+    Returns one dict per page with the same fields as
+    extract_business_info_from_website, or None for pages the response
+    skipped.
+    """
+    response = call_llm(llm, build_competitor_profiles_prompt(pages), use_cache=use_cache)
+    
+    def field(value):
+        return '' if value.lower().strip('. ') == 'not specified' else value
+    
+    profiles = [None] * len(pages)
+    with span('parse.profiles'):
+        for number, name, description, industry in PROFILE_LINE.findall(response):
+            index = int(number) - 1
+            if 0 <= index < len(pages):
+                profiles[index] = {
+                    'business_name': field(name),
+                    'business_description': field(description),
+                    'business_website': pages[index][0],
+                    'business_industry': field(industry)
+                }
+    return profiles
+
+def enriched_competitor(competitor, profile):
+    """A competitor row updated with what its own website says"""
+    row = dict(competitor)
+    row['source_url'] = competitor.get('website', '')
+    row['website'] = profile['business_website']
+    if profile['business_description']:
+        row['description'] = profile['business_description']
+    if profile['business_industry']:
+        row['industry'] = profile['business_industry']
+    row['enriched'] = True
+    return row
+
+def enrich_competitors(competitors, llm, tavily_client=None, deadline=45, per_host=2, max_workers=8,
+                       batch_size=ENRICH_BATCH_SIZE, industry=None, use_cache=True):
+    """Profile competitors from their own homepages, yielding (index, row) as each finishes
+
+    Homepages are resolved and scraped concurrently, at most `per_host` at a
+    time per host. Scraped pages are profiled `batch_size` to an LLM call,
+    each batch sent as soon as it fills, so the first rows arrive while
+    later sites are still loading. Everything shares one `deadline` in
+    seconds, cut to what is left of the current request's deadline;
+    competitors not profiled by then, or whose site can't be found or
+    scraped, are not yielded. With `industry`, profiled rows are also
+    written back to the competitor index under it.
+    """
+    end = time.monotonic() + min(deadline, remaining(deadline))
+    limiter = HostLimiter(per_host)
+    fetch_executor = ThreadPoolExecutor(max_workers=max_workers)
+    extract_executor = ThreadPoolExecutor(max_workers=max(max_workers // batch_size, 1))
+    
+    running = {
+        submit_in_context(fetch_executor, fetch_competitor_homepage, competitor, tavily_client, limiter): ('page', index)
+        for index, competitor in enumerate(competitors)
+    }
+    pages_left = len(running)
+    scraped = []
+    
+    try:
+        while running:
+            done, _ = wait(running, timeout=max(end - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            if not done:
+                logger.warning("Competitor enrichment missed the deadline with %d tasks left", len(running))
+                break
+            
+            for future in done:
+                kind, info = running.pop(future)
+                if kind == 'page':
+                    pages_left -= 1
+                    try:
+                        homepage, content = future.result()
+                    except Exception as e:
+                        logger.warning("Error fetching %s homepage: %s", competitors[info]['name'], e)
+                        continue
+                    if content:
+                        scraped.append((info, homepage, content))
+                    continue
+                
+                try:
+                    profiles = future.result()
+                except Exception as e:
+                    logger.warning("Error profiling competitors: %s", e)
+                    continue
+                rows = []
+                for (index, _, _), profile in zip(info, profiles):
+                    if profile:
+                        rows.append(enriched_competitor(competitors[index], profile))
+                        yield index, rows[-1]
+                if industry and rows:
+                    competitor_index.add(industry, rows)
+            
+            # Send full batches, and whatever is left once no more pages are coming
+            while len(scraped) >= batch_size or (scraped and not pages_left):
+                batch, scraped = scraped[:batch_size], scraped[batch_size:]
+                pages = [(homepage, content) for _, homepage, content in batch]
+                future = submit_in_context(extract_executor, extract_competitor_profiles, pages, llm, use_cache=use_cache)
+                running[future] = ('profiles', batch)
+    finally:
+        fetch_executor.shutdown(wait=False, cancel_futures=True)
+        extract_executor.shutdown(wait=False, cancel_futures=True)
+
+# =============================================================================
+# VALIDATION
+# =============================================================================
 
 def validate_url(url):
     """Basic URL validation"""